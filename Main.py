@@ -1,17 +1,41 @@
+from startup import STARTUP    # First, so startup timing covers imports
 import json
+import logging
 import os
 import random
 from dotenv import load_dotenv
-import re
 import time
 import asyncio
-from thefuzz import fuzz, process
 import aiohttp
 import discord
 from discord.ext import commands
-from counter_hero_list import mlbb_hero_counters as COUNTER_HERO_LIST
-import openai
-from generalised_counter_reasoning import counter_groups
+from upstream import UpstreamClient
+from caching import StaleWhileRevalidateCache
+from hero_snapshot import load_snapshot, save_snapshot
+from crawler import AdaptiveCrawler
+from hero_records import HeroRecord
+from hero_resolver import SUGGEST_THRESHOLD, HeroResolver
+from counter_index import build_counter_index, log_report
+from explanations import ExplanationCache, openai_configured
+from static_data import load_static_data
+from counter_table import CounterTable, build_counter_table
+from hero_stats import HeroRankError, HeroStatsTable, METRICS, metric_name
+from paginator import PaginatorView, ViewRegistry
+from popularity import PopularityTracker
+from rate_limit import (
+    AdaptiveTokenBucket, RateLimited, holding_token, token_held,
+)
+from response_cache import ResponseCache, embed_from_payload, embed_payload
+from trivia_bank import DIFFICULTIES, TriviaDecks, build_question_bank
+from trivia_games import TriviaDispatcher
+from metrics import MetricsRegistry, start_metrics_server
+from loop_monitor import (
+    CURRENT_COMMAND, LoopLagMonitor, SlowCallbackDetector, set_stage,
+)
+from bot_logging import (
+    configure_logging, get_logger, log_event, new_correlation_id,
+)
+STARTUP.mark("imports")
 
 # =========================
 # Configuration & Constants
@@ -20,7 +44,84 @@ from generalised_counter_reasoning import counter_groups
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
-BASE_API_URL = "https://api-mobilelegends.vercel.app/api/"
+
+# JSON logs on stdout, written from a background thread. LOG_LEVEL=INFO
+# (the default) drops all debug lines; high-volume events such as
+# per-command timings are only written one in LOG_SAMPLE_EVERY times.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "10"))
+LOG_HANDLER = configure_logging(LOG_LEVEL)
+log = get_logger()
+BASE_API_URL = os.getenv(
+    "MLBB_API_URL", "https://api-mobilelegends.vercel.app/api/"
+)
+
+# Hero list and counter data, from the precompiled artifact (static_data.py)
+STATIC_DATA = load_static_data()
+hero_dict = STATIC_DATA["hero_dict"]
+counter_groups = STATIC_DATA["counter_groups"]
+COUNTER_HERO_LIST = STATIC_DATA["hero_counters"]
+STARTUP.mark("static_data")
+
+# How long a hero-rank response is served as fresh (seconds). Older entries
+# are still served while one background refresh runs, up to the max age.
+HERO_RANK_CACHE_TTL = int(os.getenv("HERO_RANK_CACHE_TTL", "900"))
+HERO_RANK_CACHE_MAX_STALE = int(
+    os.getenv("HERO_RANK_CACHE_MAX_STALE", "86400")
+)
+
+# Keep the full hero-detail JSON in memory (and in the snapshot) alongside
+# the compact HeroRecords. Off by default; commands only need the records.
+KEEP_RAW_HERO_DETAILS = os.getenv("KEEP_RAW_HERO_DETAILS", "0") == "1"
+
+# Compressed snapshot of the hero caches, loaded on boot for a warm start
+HERO_SNAPSHOT_PATH = os.getenv(
+    "HERO_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                 "hero_snapshot.json.gz"),
+)
+
+# Persistent cache of OpenAI counter explanations, and how long !mlbb
+# counter waits for missing ones before falling back to group reasons
+EXPLANATION_CACHE_PATH = os.getenv(
+    "EXPLANATION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                 "counter_explanations.json"),
+)
+COUNTER_EXPLANATION_BUDGET = float(
+    os.getenv("COUNTER_EXPLANATION_BUDGET", "2.5")
+)
+
+# Seconds between hero data refreshes, and between retries while no hero
+# data has loaded at all (so a failed cold start doesn't serve nothing for
+# an hour)
+HERO_REFRESH_INTERVAL = 3600
+HERO_RETRY_DELAY = 60
+
+# Seconds between background ingestions of every hero-rank window. Keep it
+# below HERO_RANK_CACHE_TTL so commands always hit fresh rankings.
+RANK_INGEST_INTERVAL = int(os.getenv("RANK_INGEST_INTERVAL", "600"))
+
+# Synergy lookups: per-hero TTL and LRU bound, and how many of the most
+# requested heroes the background prefetcher keeps warm
+SYNERGY_CACHE_TTL = int(os.getenv("SYNERGY_CACHE_TTL", "1800"))
+SYNERGY_CACHE_SIZE = int(os.getenv("SYNERGY_CACHE_SIZE", "64"))
+SYNERGY_PREFETCH_COUNT = int(os.getenv("SYNERGY_PREFETCH_COUNT", "16"))
+SYNERGY_PREFETCH_INTERVAL = 120         # Seconds between prefetch rounds
+SYNERGY_DECAY_ROUNDS = 30               # Halve popularity every hour
+
+# Upstream budget for commands whose answer isn't cached: sustained
+# requests per second (adapted to upstream errors) and burst size
+UPSTREAM_RATE_LIMIT = float(os.getenv("UPSTREAM_RATE_LIMIT", "1.0"))
+UPSTREAM_BURST = int(os.getenv("UPSTREAM_BURST", "5"))
+
+# Local Prometheus endpoint (/metrics and /ready); METRICS_PORT=0 disables
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# Loop callbacks running longer than this (seconds) are logged with the
+# command and stage responsible, and listed by !mlbb loopstats
+SLOW_CALLBACK_THRESHOLD = float(os.getenv("SLOW_CALLBACK_THRESHOLD", "0.1"))
 
 # Configure intents
 intents = discord.Intents.default()
@@ -44,7 +145,108 @@ COLORS = {
 
 bot_start_time = time.time()  # Track bot start time
 
-bot = commands.Bot(
+# Event-driven metrics; everything else is read from stats at scrape time
+# by collect_bot_metrics()
+BOT_METRICS = MetricsRegistry()
+COMMAND_LATENCY = BOT_METRICS.histogram(
+    "mlbb_command_duration_seconds",
+    "Time spent in command handlers.",
+    ("command", "outcome"),
+)
+UPSTREAM_LATENCY = BOT_METRICS.histogram(
+    "mlbb_upstream_request_duration_seconds",
+    "Latency of requests to the MLBB stats API.",
+)
+UPSTREAM_RESPONSES = BOT_METRICS.counter(
+    "mlbb_upstream_responses_total",
+    "MLBB stats API responses by HTTP status (error = no response).",
+    ("status",),
+)
+LOOP_LAG = BOT_METRICS.histogram(
+    "mlbb_event_loop_lag_seconds",
+    "How late the event loop ran a periodic timer.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+LOOP_MONITOR = LoopLagMonitor(on_sample=LOOP_LAG.observe)
+SLOW_CALLBACKS = BOT_METRICS.counter(
+    "mlbb_slow_callbacks_total",
+    "Event-loop callbacks over SLOW_CALLBACK_THRESHOLD, by command/stage.",
+    ("command", "stage"),
+)
+
+
+def on_slow_callback(event):
+    SLOW_CALLBACKS.inc(command=event["command"] or "none",
+                       stage=event["stage"] or "none")
+    fields = dict(event)
+    log_event(log, logging.WARNING, fields.pop("event"),
+              f"Event loop blocked for {event['duration_ms']:.0f} ms",
+              **fields)
+
+
+SLOW_CALLBACK_DETECTOR = SlowCallbackDetector(
+    threshold=SLOW_CALLBACK_THRESHOLD, on_slow=on_slow_callback,
+)
+
+# Shared pooled HTTP client for every upstream API call. Commands take a
+# token from UPSTREAM_LIMITER only when they are about to miss the cache;
+# the outcomes of those requests (not background crawls) adapt its rate.
+UPSTREAM_LIMITER = AdaptiveTokenBucket(
+    rate=UPSTREAM_RATE_LIMIT,
+    capacity=UPSTREAM_BURST,
+    max_rate=max(UPSTREAM_RATE_LIMIT, 5.0),
+)
+
+
+def on_upstream_result(ok, status, latency):
+    if token_held():
+        UPSTREAM_LIMITER.record(ok)
+    UPSTREAM_LATENCY.observe(latency)
+    UPSTREAM_RESPONSES.inc(status=status if status is not None else "error")
+
+
+UPSTREAM = UpstreamClient(BASE_API_URL, on_result=on_upstream_result)
+EXPLANATIONS = ExplanationCache(EXPLANATION_CACHE_PATH)
+
+
+class AllSeeingEyeBot(commands.Bot):
+    """Bot that owns the lifecycle of the shared upstream client."""
+
+    async def setup_hook(self):
+        STARTUP.mark("login")
+        await UPSTREAM.start()
+        # Warm start: commands work as soon as we connect, while the
+        # background refresh revalidates against the API.
+        load_hero_snapshot()
+        count = EXPLANATIONS.load()
+        if count:
+            log.info("Loaded %d cached counter explanations.", count)
+        STARTUP.mark("warm_start")
+        LOOP_MONITOR.start()
+        SLOW_CALLBACK_DETECTOR.install()
+        self.metrics_runner = None
+        if METRICS_PORT:
+            try:
+                self.metrics_runner = await start_metrics_server(
+                    BOT_METRICS, METRICS_HOST, METRICS_PORT,
+                    is_ready=bot_is_ready,
+                )
+                log.info("Metrics on http://%s:%d/metrics", METRICS_HOST,
+                         METRICS_PORT)
+            except OSError as e:
+                log.warning("Could not start metrics endpoint: %s", e)
+
+    async def close(self):
+        LOOP_MONITOR.stop()
+        SLOW_CALLBACK_DETECTOR.uninstall()
+        if getattr(self, "metrics_runner", None) is not None:
+            await self.metrics_runner.cleanup()
+        await EXPLANATIONS.flush()
+        await UPSTREAM.close()
+        await super().close()
+
+
+bot = AllSeeingEyeBot(
     command_prefix="!",
     intents=intents,
     help_command=None,
@@ -59,192 +261,836 @@ bot = commands.Bot(
 # Global Hero Data Caches
 # =========================
 
-HERO_DETAILS_CACHE = {}       # hero_id (str) -> full hero detail JSON
+HERO_RECORDS = {}             # hero_id (str) -> HeroRecord
+HERO_DETAILS_CACHE = {}       # hero_id (str) -> raw detail JSON, if kept
 HERO_NAME_TO_ID_MAP = {}      # hero_name (lowercase str) -> hero_id (str)
 HERO_ID_TO_NAME_MAP = {}      # hero_id (str) -> hero_name (str)
-ACTIVE_TRIVIA_GAME = {}       # channel_id (int) -> bool
+HERO_DETAIL_VALIDATORS = {}   # hero_id (str) -> etag/last_modified/hash
+HERO_RESOLVER = HeroResolver({}, {})  # Fuzzy hero-name lookup, per snapshot
+
+
+COUNTER_REPORT = None         # Summary of the last logged counter report
+
+
+def build_counter_data(id_to_name):
+    """Index the static counter data against ``id_to_name``.
+
+    Issues in the counter data are logged when they differ from the last
+    build's, e.g. after new heroes arrive from the API.
+    """
+    global COUNTER_REPORT
+    index = build_counter_index(
+        id_to_name, counter_groups, COUNTER_HERO_LIST,
+        name_matches=STATIC_DATA["name_matches"], matched_against=hero_dict,
+    )
+    COUNTER_REPORT = log_report(index.report, COUNTER_REPORT)
+    return index
+
+
+# Counter groups and counter lists by canonical hero key. Keyed by name
+# from hero_list.py until API data is loaded, then by hero ID.
+COUNTER_INDEX = build_counter_data({name: name for name in hero_dict})
+TRIVIA_GAMES = TriviaDispatcher(ignore_prefix="!")  # channel_id -> game
+TRIVIA_ROUND_TIMEOUT = 30     # Seconds to answer a single question
+TRIVIA_SPEED_TIMEOUT = 15     # Seconds per round in multi-round games
+TRIVIA_MAX_ROUNDS = 10
+TRIVIA_BANK = build_question_bank({})  # Rebuilt whenever data is ingested
+TRIVIA_DECKS = TriviaDecks()  # Per-channel no-repeat question order
+HERO_DATA_VERSION = 0         # Bumped every time new hero data is swapped in
+HERO_DATA_CHECKED_AT = None   # time.time() the hero data was last confirmed
+
+# Sanity limits a refreshed hero snapshot must pass before it is swapped in
+MIN_HERO_COUNT = 100          # Fewer heroes means a broken hero list
+MAX_HERO_LOSS_RATIO = 0.1     # Reject refreshes that drop >10% of heroes
+REQUIRED_HERO_FIELDS = ("sortlabel", "heroskilllist")
+LAST_CRAWL_REPORT = {}        # Summary of the most recent hero-detail crawl
+
+# Win rates !mlbb counter sorts by, and the table built from them
+COUNTER_RANK_KEY = ("all", 7)
+HERO_WINRATES = {}            # hero name (lowercase) -> win rate
+WINRATE_VERSION = 0           # Bumped every time HERO_WINRATES changes
+COUNTER_TABLE = CounterTable({}, (0, 0))
+
+# Every hero-rank window is ingested together by ingest_hero_ranks()
+RANK_FILTERS = ["all", "epic", "legend", "mythic", "honor", "glory"]
+RANK_DAY_WINDOWS = (7, 30)
+RANK_SNAPSHOT_VERSION = 0     # Bumped every time a full ingestion lands
+LAST_RANK_INGEST = {}         # Summary of the most recent rank ingestion
+
+# Win-rate-by-duration fields of a synergy partner, in display order
+SYNERGY_TIME_SEGMENTS = (
+    "min_win_rate6_8", "min_win_rate8_10", "min_win_rate10_12",
+    "min_win_rate12_14", "min_win_rate14_16", "min_win_rate16_18",
+    "min_win_rate18_20", "min_win_rate20",
+)
+SYNERGY_POPULARITY = PopularityTracker(capacity=SYNERGY_PREFETCH_COUNT * 2)
+
+# Paginated !mlbb ranks leaderboards
+LEADERBOARD_PAGE_SIZE = 10
+LEADERBOARD_VIEW_TIMEOUT = 180          # Seconds before buttons go inactive
+LEADERBOARD_VIEWS = ViewRegistry(max_views=50)
+
+# Rendered responses by (command, normalized args, data version)
+RESPONSES = ResponseCache(maxsize=256)
+
+
+async def load_hero_rank(key):
+    """Fetch one hero-rank page for a (rank, days) cache key.
+
+    Raises HeroRankError (and so caches nothing) on an API-level error.
+    """
+    rank_filter, days_filter = key
+    data = await UPSTREAM.get_json(
+        "hero-rank/",
+        params={
+            "rank": rank_filter,
+            "days": days_filter,
+            # One page covering the whole hero list
+            "size": max(len(HERO_ID_TO_NAME_MAP), len(hero_dict)),
+        },
+    )
+    return HeroStatsTable.from_rank_json(data)
+
+
+def _synergy_partner(partner):
+    """Keep only the fields !mlbb synergy shows for one partner hero."""
+    fields = ("heroid", "hero_win_rate", "hero_appearance_rate",
+              "increase_win_rate") + SYNERGY_TIME_SEGMENTS
+    return {key: partner[key] for key in fields if key in partner}
+
+
+async def load_hero_synergy(hero_id):
+    """Fetch a hero's synergy stats, trimmed to what the command shows.
+
+    Returns ``None`` when the API has no records for the hero.
+    """
+    json_data = await UPSTREAM.get_json(f"hero-detail-stats/{hero_id}/")
+    records = json_data.get("data", {}).get("records", [])
+    if not records:
+        return None
+    hero_stats = records[0]["data"]
+    return {
+        "main_hero_win_rate": hero_stats.get("main_hero_win_rate", 0),
+        "main_hero_appearance_rate": hero_stats.get(
+            "main_hero_appearance_rate", 0
+        ),
+        "main_hero_ban_rate": hero_stats.get("main_hero_ban_rate", 0),
+        "sub_hero": [
+            _synergy_partner(h) for h in hero_stats.get("sub_hero", [])[:3]
+        ],
+        "sub_hero_last": [
+            _synergy_partner(h)
+            for h in hero_stats.get("sub_hero_last", [])[:2]
+        ],
+    }
+
+
+# hero_id -> trimmed synergy stats; the hottest heroes are kept warm by
+# background_synergy_prefetch()
+SYNERGY_CACHE = StaleWhileRevalidateCache(
+    load_hero_synergy,
+    ttl=SYNERGY_CACHE_TTL,
+    max_stale=SYNERGY_CACHE_TTL * 4,
+    cacheable=lambda data: data is not None,
+    name="synergy",
+    maxsize=SYNERGY_CACHE_SIZE,
+)
+
+# (rank, days) -> HeroStatsTable, served stale-while-revalidate
+HERO_RANK_CACHE = StaleWhileRevalidateCache(
+    load_hero_rank,
+    ttl=HERO_RANK_CACHE_TTL,
+    max_stale=HERO_RANK_CACHE_MAX_STALE,
+    name="hero-rank",
+    on_update=lambda key, table: on_hero_rank_update(key, table),
+)
 
 # Helper Functions
 # =========================
 
 
-def clean_html_tags(text):
-    """Remove <font ...> and </font> tags from a string.
-    Handles non-string input."""
-    if not isinstance(text, str):
-        return ""
-    return re.sub(r'<font[^>]*>', '', text).replace('</font>', '')
+def swap_hero_caches(records, name_to_id, id_to_name, validators,
+                     hero_details=None):
+    """Atomically replace all hero caches with a new, complete set.
+
+    The maps are rebound together with no await in between, so a command
+    never sees a half-built or mixed snapshot. The dicts are never mutated
+    after the swap.
+    """
+    global HERO_RECORDS, HERO_DETAILS_CACHE, HERO_NAME_TO_ID_MAP
+    global HERO_ID_TO_NAME_MAP, HERO_DETAIL_VALIDATORS, HERO_DATA_VERSION
+    global HERO_RESOLVER, COUNTER_INDEX, HERO_DATA_CHECKED_AT
+    resolver = HeroResolver(name_to_id, id_to_name)
+    counter_index = (
+        build_counter_data(id_to_name)
+        if id_to_name != HERO_ID_TO_NAME_MAP else COUNTER_INDEX
+    )
+    HERO_RECORDS = records
+    HERO_DETAILS_CACHE = hero_details or {}
+    HERO_NAME_TO_ID_MAP = name_to_id
+    HERO_ID_TO_NAME_MAP = id_to_name
+    HERO_DETAIL_VALIDATORS = validators
+    HERO_RESOLVER = resolver
+    COUNTER_INDEX = counter_index
+    HERO_DATA_VERSION += 1
+    HERO_DATA_CHECKED_AT = time.time()
+    rebuild_counter_table()
+    rebuild_trivia_bank()
+
+
+def rebuild_counter_table():
+    """Rebuild the sorted counter table from the current data."""
+    global COUNTER_TABLE
+    COUNTER_TABLE = build_counter_table(
+        COUNTER_INDEX,
+        HERO_ID_TO_NAME_MAP,
+        HERO_RECORDS,
+        HERO_WINRATES,
+        (HERO_DATA_VERSION, WINRATE_VERSION),
+    )
+
+
+def rebuild_trivia_bank():
+    """Regenerate every trivia question from the current data."""
+    global TRIVIA_BANK
+    rank_tables = {
+        (rank, days): HERO_RANK_CACHE.peek((rank, days))
+        for rank in RANK_FILTERS for days in RANK_DAY_WINDOWS
+    }
+    # Rank ingestion only refreshes the stat answers in place, so decks
+    # keep their no-repeat order until the hero data itself changes
+    TRIVIA_BANK = build_question_bank(
+        HERO_RECORDS, rank_tables, version=HERO_DATA_VERSION,
+    )
+    log_event(log, logging.DEBUG, "trivia_bank_built",
+              questions=len(TRIVIA_BANK), version=TRIVIA_BANK.version)
+
+
+def on_hero_rank_update(key, table):
+    """Re-sort the counter table when the win rates it uses change."""
+    global HERO_WINRATES, WINRATE_VERSION
+    if key != COUNTER_RANK_KEY:
+        return
+    winrates = table.winrates_by_name()
+    if winrates == HERO_WINRATES:
+        return
+    HERO_WINRATES = winrates
+    WINRATE_VERSION += 1
+    rebuild_counter_table()
+
+
+def hero_detail_is_valid(detail):
+    """Check a hero-detail payload has the fields commands rely on."""
+    try:
+        hero = detail["data"]["records"][0]["data"]["hero"]["data"]
+    except (KeyError, IndexError, TypeError):
+        return False
+    return isinstance(hero, dict) and all(
+        field in hero for field in REQUIRED_HERO_FIELDS
+    )
+
+
+def validate_hero_data(records, id_to_name, previous_count):
+    """Return a list of problems that make a new snapshot unusable."""
+    problems = []
+    if len(id_to_name) < MIN_HERO_COUNT:
+        problems.append(
+            f"hero list has {len(id_to_name)} heroes "
+            f"(minimum {MIN_HERO_COUNT})"
+        )
+    missing = len(id_to_name) - len(records)
+    if missing > len(id_to_name) * MAX_HERO_LOSS_RATIO:
+        problems.append(f"{missing} of {len(id_to_name)} heroes have no "
+                        f"usable detail data")
+    if previous_count and (
+        len(records) < previous_count * (1 - MAX_HERO_LOSS_RATIO)
+    ):
+        problems.append(
+            f"detail count fell from {previous_count} to "
+            f"{len(records)}"
+        )
+    return problems
+
+
+def load_hero_snapshot():
+    """Populate the hero caches from the on-disk snapshot, if any."""
+    global HERO_DATA_CHECKED_AT
+    started = time.perf_counter()
+    snapshot = load_snapshot(HERO_SNAPSHOT_PATH)
+    if not snapshot:
+        log.debug("No usable hero snapshot found; cold start.")
+        return False
+    problems = validate_hero_data(
+        snapshot["records"], snapshot["id_to_name"], 0
+    )
+    if problems:
+        log_event(log, logging.WARNING, "hero_snapshot_rejected",
+                  "Ignoring hero snapshot: " + "; ".join(problems),
+                  problems=problems)
+        return False
+    swap_hero_caches(
+        snapshot["records"],
+        snapshot["name_to_id"],
+        snapshot["id_to_name"],
+        snapshot["validators"],
+        snapshot["hero_details"] if KEEP_RAW_HERO_DETAILS else None,
+    )
+    HERO_DATA_CHECKED_AT = snapshot["saved_at"]
+    log_event(
+        log, logging.INFO, "hero_snapshot_loaded",
+        f"Loaded {len(HERO_RECORDS)} heroes from snapshot",
+        heroes=len(HERO_RECORDS),
+        age_s=round(time.time() - snapshot["saved_at"]),
+        duration_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+    return True
+
+
+async def save_hero_snapshot():
+    """Write the current hero caches to disk without blocking the loop."""
+    try:
+        size = await asyncio.to_thread(
+            save_snapshot,
+            HERO_SNAPSHOT_PATH,
+            HERO_RECORDS,
+            HERO_DETAILS_CACHE,
+            HERO_NAME_TO_ID_MAP,
+            HERO_ID_TO_NAME_MAP,
+            HERO_DETAIL_VALIDATORS,
+        )
+        log_event(log, logging.DEBUG, "hero_snapshot_saved", bytes=size)
+    except OSError as e:
+        log.warning("Failed to save hero snapshot: %s", e)
+
+
+def report_crawl(report):
+    """Log a hero-detail crawl report and keep its summary for later."""
+    global LAST_CRAWL_REPORT
+    for hero_id, error in report["failures"].items():
+        log_event(log, logging.WARNING, "hero_detail_failed",
+                  f"Giving up on detail for hero ID {hero_id}",
+                  hero_id=hero_id, error=str(error))
+    LAST_CRAWL_REPORT = {
+        key: value for key, value in report.items()
+        if key not in ("latencies", "failures")
+    }
+    LAST_CRAWL_REPORT["finished_at"] = time.time()
+    slowest = sorted(
+        report["latencies"].items(), key=lambda item: item[1], reverse=True
+    )[:3]
+    log_event(
+        log, logging.DEBUG, "hero_detail_crawl",
+        f"Crawled {report['fetched']}/{report['requested']} hero details",
+        **LAST_CRAWL_REPORT,
+        slowest_ms={hid: round(lat * 1000) for hid, lat in slowest},
+    )
+
+
+async def reserve_upstream(ctx):
+    """Wait for an upstream token before a command misses the cache.
+
+    Tells the user their queue position and ETA if they have to wait.
+    Returns False (after telling the user) when upstream is too busy.
+    Make the request inside ``holding_token()`` so it counts as using the
+    token.
+    """
+    async def notify(position, eta):
+        await ctx.send(
+            f"⏳ Fetching fresh data — you're #{position} in the queue, "
+            f"about {max(1, round(eta))}s."
+        )
+
+    try:
+        await UPSTREAM_LIMITER.acquire(on_queued=notify)
+    except RateLimited as e:
+        await ctx.send(embed=discord.Embed(
+            title="⏳ Busy Right Now",
+            description=(
+                "Too many requests are waiting on the stats API. "
+                f"Please try again in about {max(1, round(e.retry_after))}s."
+            ),
+            color=COLORS["error"],
+        ))
+        return False
+    return True
+
+
+def hero_not_found_embed(hero_name, hint=""):
+    """Build the "Hero Not Found" embed with "did you mean" suggestions."""
+    description = f"Hero '{hero_name}' not found. Check spelling."
+    # Weak matches are usually unrelated heroes, so only offer close ones
+    suggestions = HERO_RESOLVER.suggest(
+        hero_name, min_score=SUGGEST_THRESHOLD
+    )
+    if suggestions:
+        description += "\nDid you mean: " + ", ".join(
+            f"**{name}**" for name, _ in suggestions
+        ) + "?"
+    if hint:
+        description += f"\n{hint}"
+    return discord.Embed(
+        title="⚠️ Hero Not Found",
+        description=description,
+        color=COLORS["error"],
+    )
 
 
 async def fetch_and_cache_hero_data():
-    """Fetch and cache all hero data at startup."""
-    global HERO_DETAILS_CACHE, HERO_NAME_TO_ID_MAP, HERO_ID_TO_NAME_MAP
-    # Clear caches at the very beginning of this function to ensure a fresh
-    # start
-    HERO_DETAILS_CACHE.clear()
-    HERO_NAME_TO_ID_MAP.clear()
-    HERO_ID_TO_NAME_MAP.clear()
-    print("DEBUG: Caches cleared before fetching new data.")
+    """Fetch all hero data and swap it in once it passes sanity checks.
+
+    The new snapshot is built off to the side while commands keep serving
+    the current one. If the refresh fails or looks broken, the last good
+    snapshot stays in place.
+    """
+    global HERO_DETAIL_VALIDATORS, HERO_DATA_CHECKED_AT
+    new_records = {}
+    new_details = {}
+    new_name_to_id = {}
+    new_id_to_name = {}
+    new_validators = {}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            # --- Step 1: Fetch all hero IDs and names ---
-            hero_list_url = f"{BASE_API_URL}hero-list/"
-            print(f"DEBUG: Attempting to fetch hero list from: "
-                  f"{hero_list_url}")
-            async with session.get(hero_list_url) as resp:
-                resp.raise_for_status()
-                hero_list = await resp.json()
-                print(f"DEBUG: Successfully fetched hero list. Contains "
-                      f"{len(hero_list)} entries.")
-
-            hero_ids_to_fetch_details = []
-            for hero_id, hero_name in hero_list.items():
-                hero_id_str = str(hero_id)
-                lower_hero_name = hero_name.strip().lower()
-                HERO_NAME_TO_ID_MAP[lower_hero_name] = hero_id_str
-                HERO_ID_TO_NAME_MAP[hero_id_str] = hero_name
-                hero_ids_to_fetch_details.append(hero_id_str)
-
-            print(f"DEBUG: Populated name-to-ID maps. Total heroes: "
-                  f"{len(HERO_NAME_TO_ID_MAP)}")
-
-            # --- Step 2: Concurrently fetch all hero details ---
-            async def fetch_hero_detail(session_inner, hero_id_str_inner):
-                detail_url = f"{BASE_API_URL}hero-detail/{hero_id_str_inner}/"
-                try:
-                    async with session_inner.get(detail_url) as resp_detail:
-                        resp_detail.raise_for_status()
-                        return hero_id_str_inner, await resp_detail.json()
-                except aiohttp.ClientError as e:
-                    # Log the specific network/client error for this hero
-                    print(f"⚠️ Network error fetching detail for ID "
-                          f"{hero_id_str_inner}: {e}")
-                    return hero_id_str_inner, None
-                except json.JSONDecodeError:
-                    # Log JSON decode errors for this hero
-                    print(f"⚠️ JSON decode error for hero ID "
-                          f"{hero_id_str_inner}.")
-                    return hero_id_str_inner, None
-                except Exception as e:
-                    # Catch any other unexpected errors
-                    print(f"⚠️ Unexpected error fetching detail for ID "
-                          f"{hero_id_str_inner}: {e}")
-                    return hero_id_str_inner, None
-
-            # Create tasks for all detail fetches, passing the session
-            tasks = [fetch_hero_detail(session, hid) for hid in
-                     hero_ids_to_fetch_details]
-
-            # Run tasks concurrently, capturing exceptions
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            successful_fetches = 0
-            for result in results:
-                if isinstance(result, tuple) and len(result) == 2:
-                    hero_id_str_result, detail_json_result = result
-                    if detail_json_result:
-                        HERO_DETAILS_CACHE[hero_id_str_result] = \
-                            detail_json_result
-                        successful_fetches += 1
-                    else:
-                        hero_name_for_debug = HERO_ID_TO_NAME_MAP.get(
-                            hero_id_str_result, "Unknown Hero")
-                        print(f"DEBUG: Failed to cache details for "
-                              f"{hero_name_for_debug} (ID: "
-                              f"{hero_id_str_result}) due to API issue.")
-                elif isinstance(result, Exception):
-                    # An exception was returned directly from asyncio.gather
-                    print(f"DEBUG: An unhandled exception occurred during a "
-                          f"detail fetch: {result}")
+        # --- Step 1: Fetch all hero IDs and names ---
+        set_stage("hero_list")
+        hero_list = await UPSTREAM.get_json("hero-list/")
+        log_event(log, logging.DEBUG, "hero_list_fetched",
+                  heroes=len(hero_list))
+
+        hero_ids_to_fetch_details = []
+        for hero_id, hero_name in hero_list.items():
+            hero_id_str = str(hero_id)
+            lower_hero_name = hero_name.strip().lower()
+            new_name_to_id[lower_hero_name] = hero_id_str
+            new_id_to_name[hero_id_str] = hero_name
+            hero_ids_to_fetch_details.append(hero_id_str)
+
+        # --- Step 2: Crawl all hero details with adaptive concurrency ---
+        # Heroes we already hold are revalidated with conditional requests
+        # (ETag / Last-Modified) or, failing that, a hash of the body, so
+        # unchanged payloads are neither downloaded nor re-parsed.
+        async def fetch_hero_detail(hero_id_str_inner):
+            have_previous = hero_id_str_inner in HERO_RECORDS and (
+                not KEEP_RAW_HERO_DETAILS
+                or hero_id_str_inner in HERO_DETAILS_CACHE
+            )
+            previous = (
+                HERO_DETAIL_VALIDATORS.get(hero_id_str_inner, {})
+                if have_previous else {}
+            )
+            response = await UPSTREAM.get_conditional(
+                f"hero-detail/{hero_id_str_inner}/",
+                etag=previous.get("etag"),
+                last_modified=previous.get("last_modified"),
+            )
+            validators = {
+                "etag": response["etag"],
+                "last_modified": response["last_modified"],
+                "hash": response["hash"] or previous.get("hash"),
+            }
+            if response["status"] == 304:
+                return "not_modified", validators, None
+            if response["hash"] == previous.get("hash"):
+                return "same_hash", validators, None
+            return "changed", validators, json.loads(response["body"])
+
+        set_stage("crawl")
+        crawler = AdaptiveCrawler(fetch_hero_detail)
+        results, report = await crawler.crawl(hero_ids_to_fetch_details)
+        report_crawl(report)
+        set_stage("build_records")
+
+        outcomes = {"not_modified": 0, "same_hash": 0}
+        carried_over = 0
+        changed_ids = []
+        for hero_id_str_result, result in results.items():
+            hero_name = new_id_to_name[hero_id_str_result]
+            previous_record = HERO_RECORDS.get(hero_id_str_result)
+            outcome, validators, detail_json_result = result or (
+                None, None, None
+            )
+            if outcome == "changed" and hero_detail_is_valid(
+                detail_json_result
+            ):
+                # Only changed payloads are projected into a new record
+                new_records[hero_id_str_result] = HeroRecord.from_detail(
+                    hero_id_str_result, hero_name, detail_json_result
+                )
+                if KEEP_RAW_HERO_DETAILS:
+                    new_details[hero_id_str_result] = detail_json_result
+                new_validators[hero_id_str_result] = validators
+                changed_ids.append(hero_id_str_result)
+            elif previous_record is not None:
+                if outcome in ("not_modified", "same_hash"):
+                    new_validators[hero_id_str_result] = validators
+                    outcomes[outcome] += 1
                 else:
-                    print(f"DEBUG: Unexpected result format from fetch_hero_"
-                          f"detail: {result}")
-
-            print(f"DEBUG: Detail caching complete. Successfully cached "
-                  f"{successful_fetches} hero details.")
-            print(f"DEBUG: HERO_NAME_TO_ID_MAP size: "
-                  f"{len(HERO_NAME_TO_ID_MAP)}")
-            print(f"DEBUG: HERO_DETAILS_CACHE size: "
-                  f"{len(HERO_DETAILS_CACHE)}")
-
-            if "ling" in HERO_NAME_TO_ID_MAP:
-                print(f"DEBUG: 'ling' found in HERO_NAME_TO_ID_MAP. ID: "
-                      f"{HERO_NAME_TO_ID_MAP['ling']}")
-            else:
-                print("DEBUG: 'ling' NOT found in HERO_NAME_TO_ID_MAP.")
-            if "layla" in HERO_NAME_TO_ID_MAP:
-                print(f"DEBUG: 'layla' found in HERO_NAME_TO_ID_MAP. ID: "
-                      f"{HERO_NAME_TO_ID_MAP['layla']}")
+                    # Failed or invalid: keep the last good detail
+                    carried_over += 1
+                    if hero_id_str_result in HERO_DETAIL_VALIDATORS:
+                        new_validators[hero_id_str_result] = \
+                            HERO_DETAIL_VALIDATORS[hero_id_str_result]
+                if previous_record.name != hero_name:
+                    previous_record = HeroRecord.from_dict(
+                        {**previous_record.to_dict(), "name": hero_name}
+                    )
+                new_records[hero_id_str_result] = previous_record
+                if hero_id_str_result in HERO_DETAILS_CACHE:
+                    new_details[hero_id_str_result] = \
+                        HERO_DETAILS_CACHE[hero_id_str_result]
             else:
-                print("DEBUG: 'layla' NOT found in HERO_NAME_TO_ID_MAP.")
+                log_event(log, logging.DEBUG, "hero_detail_missing",
+                          hero=hero_name, hero_id=hero_id_str_result)
+
+        log_event(log, logging.DEBUG, "hero_details_merged",
+                  changed=len(changed_ids),
+                  not_modified=outcomes["not_modified"],
+                  same_hash=outcomes["same_hash"],
+                  carried_over=carried_over)
+
+        set_stage("validate")
+        problems = validate_hero_data(
+            new_records, new_id_to_name, len(HERO_RECORDS)
+        )
+        if problems:
+            log_event(log, logging.ERROR, "hero_data_rejected",
+                      "Refreshed hero data failed sanity checks; keeping "
+                      "the last good snapshot", problems=problems)
+            return False
+
+        if (not changed_ids and new_name_to_id == HERO_NAME_TO_ID_MAP
+                and new_records.keys() == HERO_RECORDS.keys()):
+            log_event(log, logging.DEBUG, "hero_data_unchanged",
+                      version=HERO_DATA_VERSION)
+            HERO_DATA_CHECKED_AT = time.time()
+            if new_validators != HERO_DETAIL_VALIDATORS:
+                HERO_DETAIL_VALIDATORS = new_validators
+                await save_hero_snapshot()
+            return True
+
+        set_stage("swap")
+        swap_hero_caches(
+            new_records, new_name_to_id, new_id_to_name, new_validators,
+            new_details,
+        )
+        log_event(log, logging.INFO, "hero_data_swapped",
+                  f"Swapped in hero data version {HERO_DATA_VERSION}",
+                  version=HERO_DATA_VERSION, heroes=len(HERO_RECORDS),
+                  rebuilt=len(changed_ids))
 
+        await save_hero_snapshot()
         return True  # Indicate success
     except aiohttp.ClientError as e:
-        print(f"❌ Network error fetching hero list: {e}")
+        log.error("Network error fetching hero list: %s", e)
         return False
     except json.JSONDecodeError:
-        print("❌ JSON decode error for hero list. API response might be "
-              "malformed.")
+        log.error("JSON decode error for hero list. API response might be "
+                  "malformed.")
         return False
-    except Exception as e:
-        print(f"❌ Unexpected error during initial hero list fetch: {e}")
+    except Exception:
+        log.exception("Unexpected error during hero data refresh")
         return False
 
 
-async def background_hero_data_refresh():
+async def background_hero_data_refresh(initial_delay=0):
     """Periodically refresh hero data cache in the background."""
+    CURRENT_COMMAND.set("hero_data_refresh")
     await bot.wait_until_ready()
+    await asyncio.sleep(initial_delay)
     while not bot.is_closed():
-        print("🔄 Refreshing hero data cache in background...")
+        new_correlation_id()
+        log.info("Refreshing hero data cache in background...")
         success = await fetch_and_cache_hero_data()
         if success:
-            print("✅ Hero data cache refreshed.")
+            log.info("Hero data cache refreshed.")
+            record_time_to_ready()    # If the startup fetch failed
+            log_event(log, logging.DEBUG, "upstream_pool_stats",
+                      **UPSTREAM.pool_stats())
         else:
-            print("❌ Failed to refresh hero data cache.")
-        await asyncio.sleep(3600)  # Refresh every hour (3600 seconds)
+            log.error("Failed to refresh hero data cache.")
+        await asyncio.sleep(
+            HERO_REFRESH_INTERVAL if HERO_RECORDS else HERO_RETRY_DELAY
+        )
+
+
+async def ingest_hero_ranks():
+    """Fetch every rank filter x day window and swap them in together.
+
+    The windows are fetched concurrently. They replace the cached rankings
+    only if all of them succeed, so every window a user can look at comes
+    from the same ingestion.
+    """
+    global RANK_SNAPSHOT_VERSION, LAST_RANK_INGEST
+    keys = [(rank, days) for rank in RANK_FILTERS for days in RANK_DAY_WINDOWS]
+    set_stage("crawl")
+    crawler = AdaptiveCrawler(load_hero_rank, initial_window=len(keys))
+    results, report = await crawler.crawl(keys)
+    LAST_RANK_INGEST = {
+        key: value for key, value in report.items()
+        if key not in ("latencies", "failures")
+    }
+    if report["failures"]:
+        for key, error in report["failures"].items():
+            log_event(log, logging.WARNING, "hero_rank_window_failed",
+                      f"Hero-rank ingestion failed for {key}",
+                      window=key, error=str(error))
+        log.error("Hero-rank ingestion incomplete; keeping previous "
+                  "rankings.")
+        return False
+
+    # No awaits from here on: all windows are swapped in at once
+    set_stage("swap")
+    for key, table in results.items():
+        HERO_RANK_CACHE.set(key, table)
+    RANK_SNAPSHOT_VERSION += 1
+    on_hero_rank_update(COUNTER_RANK_KEY, results[COUNTER_RANK_KEY])
+    rebuild_trivia_bank()
+    log_event(log, logging.DEBUG, "hero_ranks_ingested",
+              windows=len(keys), duration_s=round(report["duration"], 2),
+              version=RANK_SNAPSHOT_VERSION)
+    return True
+
+
+async def background_rank_ingestion():
+    """Periodically re-ingest every hero-rank window in the background."""
+    CURRENT_COMMAND.set("rank_ingestion")
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        new_correlation_id()
+        try:
+            await ingest_hero_ranks()
+        except Exception:
+            log.exception("Hero-rank ingestion crashed")
+        await asyncio.sleep(RANK_INGEST_INTERVAL)
+
+
+async def background_synergy_prefetch():
+    """Refresh the most requested heroes' synergy before it goes stale."""
+    CURRENT_COMMAND.set("synergy_prefetch")
+    await bot.wait_until_ready()
+    # Refresh anything that would expire before the next round
+    refresh_after = SYNERGY_CACHE_TTL - SYNERGY_PREFETCH_INTERVAL
+    rounds = 0
+    while not bot.is_closed():
+        await asyncio.sleep(SYNERGY_PREFETCH_INTERVAL)
+        due = []
+        for hero_id in SYNERGY_POPULARITY.hottest(SYNERGY_PREFETCH_COUNT):
+            age = SYNERGY_CACHE.age(hero_id)
+            if age is None or age > refresh_after:
+                due.append(hero_id)
+        if due:
+            results = await asyncio.gather(
+                *(SYNERGY_CACHE.refresh(hero_id) for hero_id in due),
+                return_exceptions=True,
+            )
+            failed = sum(isinstance(r, Exception) for r in results)
+            log_event(log, logging.DEBUG, "synergy_prefetched",
+                      due=len(due), failed=failed)
+        rounds += 1
+        if rounds % SYNERGY_DECAY_ROUNDS == 0:
+            SYNERGY_POPULARITY.decay()
+
+
+def bot_is_ready():
+    """Ready = connected to Discord with hero data loaded."""
+    return bot.is_ready() and bool(HERO_RECORDS)
+
+
+def record_time_to_ready():
+    """Record and log time-to-ready the first time the bot is ready."""
+    if not bot_is_ready() or not STARTUP.ready():
+        return
+    log_event(log, logging.INFO, "ready",
+              f"Ready {STARTUP.time_to_ready:.2f}s after start",
+              time_to_ready_s=round(STARTUP.time_to_ready, 3),
+              phases_s={phase: round(seconds, 3)
+                        for phase, seconds in STARTUP.phases.items()})
+
+
+def collect_bot_metrics():
+    """Scrape-time metric families for the /metrics endpoint."""
+    now = time.time()
+    caches = {
+        "hero_rank": HERO_RANK_CACHE.stats,
+        "synergy": SYNERGY_CACHE.stats,
+    }
+    yield ("mlbb_cache_requests_total", "counter",
+           "Cache lookups by result.", [
+               ({"cache": name, "result": result}, stats[result])
+               for name, stats in caches.items()
+               for result in ("hits", "stale_hits", "misses")
+           ] + [
+               ({"cache": "hero_resolver", "result": result},
+                HERO_RESOLVER.cache_stats[result])
+               for result in ("hits", "misses")
+           ] + [
+               ({"cache": "explanations", "result": result},
+                EXPLANATIONS.stats[result])
+               for result in ("hits", "misses")
+           ] + [
+               ({"cache": "responses", "result": result},
+                RESPONSES.stats[result])
+               for result in ("hits", "misses")
+           ])
+    yield ("mlbb_cache_entries", "gauge", "Entries held per cache.", [
+        ({"cache": "hero_rank"}, len(HERO_RANK_CACHE)),
+        ({"cache": "synergy"}, len(SYNERGY_CACHE)),
+        ({"cache": "explanations"}, len(EXPLANATIONS)),
+        ({"cache": "hero_records"}, len(HERO_RECORDS)),
+        ({"cache": "trivia_questions"}, len(TRIVIA_BANK)),
+        ({"cache": "responses"}, len(RESPONSES)),
+    ])
+    yield ("mlbb_cache_evictions_total", "counter",
+           "Entries evicted to respect a cache size bound.", [
+               ({"cache": name}, stats["evictions"])
+               for name, stats in caches.items()
+           ])
+
+    pool = UPSTREAM.pool_stats()
+    for key in ("requests", "coalesced", "errors", "not_modified",
+                "connections_created", "connections_reused",
+                "bytes_received"):
+        yield (f"mlbb_upstream_{key}_total", "counter",
+               f"Upstream client {key.replace('_', ' ')}.",
+               [({}, pool[key])])
+    yield ("mlbb_upstream_in_flight", "gauge",
+           "Upstream requests currently in flight.",
+           [({}, pool["in_flight"])])
+    yield ("mlbb_upstream_rate_limit", "gauge",
+           "Current upstream token refill rate (per second).",
+           [({}, UPSTREAM_LIMITER.rate)])
+    yield ("mlbb_upstream_queue_depth", "gauge",
+           "Commands waiting for an upstream token.",
+           [({}, UPSTREAM_LIMITER.queue_depth)])
+
+    yield ("mlbb_crawl_duration_seconds", "gauge",
+           "Duration of the most recent background crawl.", [
+               ({"job": "hero_details"}, LAST_CRAWL_REPORT.get("duration")),
+               ({"job": "hero_ranks"}, LAST_RANK_INGEST.get("duration")),
+           ])
+    yield ("mlbb_event_loop_lag_max_seconds", "gauge",
+           "Worst event-loop lag seen since startup.",
+           [({}, LOOP_MONITOR.max_lag)])
+    yield ("mlbb_log_lines_dropped_total", "counter",
+           "Log lines dropped because the log queue was full.",
+           [({}, LOG_HANDLER.dropped)])
+
+    yield ("mlbb_ready", "gauge",
+           "1 when connected to Discord with hero data loaded.",
+           [({}, int(bot_is_ready()))])
+    yield ("mlbb_time_to_ready_seconds", "gauge",
+           "Seconds from process start to first readiness.",
+           [({}, STARTUP.time_to_ready)])
+    yield ("mlbb_startup_phase_seconds", "gauge",
+           "Duration of each startup phase.",
+           [({"phase": phase}, seconds)
+            for phase, seconds in STARTUP.phases.items()])
+    yield ("mlbb_hero_data_version", "gauge",
+           "Version of the hero data being served.",
+           [({}, HERO_DATA_VERSION)])
+    yield ("mlbb_hero_data_age_seconds", "gauge",
+           "Seconds since the hero data was last confirmed upstream.",
+           [({}, now - HERO_DATA_CHECKED_AT
+             if HERO_DATA_CHECKED_AT else None)])
+    yield ("mlbb_rank_data_age_seconds", "gauge",
+           "Seconds since the all-ranks/7-day rankings were fetched.",
+           [({}, HERO_RANK_CACHE.age(COUNTER_RANK_KEY))])
+
+
+BOT_METRICS.add_collector(collect_bot_metrics)
 
 
 # =========================
 # Events
 # =========================
 
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+    # Commands run in their own task, so these label only their loop work
+    # and log lines
+    CURRENT_COMMAND.set(ctx.command.qualified_name)
+    set_stage("handler")
+    ctx.correlation_id = new_correlation_id()
+
+
+@bot.after_invoke
+async def record_command_latency(ctx):
+    started = getattr(ctx, "started_at", None)
+    if started is not None:
+        duration = time.perf_counter() - started
+        outcome = "error" if ctx.command_failed else "ok"
+        COMMAND_LATENCY.observe(
+            duration, command=ctx.command.qualified_name, outcome=outcome,
+        )
+        # Failures are always logged; successes are sampled
+        log_event(
+            log, logging.INFO, "command_completed",
+            sample_every=1 if ctx.command_failed else LOG_SAMPLE_EVERY,
+            outcome=outcome, duration_ms=round(duration * 1000, 1),
+            user_id=ctx.author.id,
+            guild_id=ctx.guild.id if ctx.guild else None,
+        )
+
+
 @bot.event
 async def on_ready():
     """Handle bot startup."""
-    print(f"✅ {bot.user} is connected to Discord!")
-    print(f"Guilds: {len(bot.guilds)}")
+    log_event(log, logging.INFO, "connected",
+              f"{bot.user} is connected to Discord!",
+              guilds=len(bot.guilds))
     # Leave unauthorized servers
     for guild in bot.guilds:
         if guild.id not in ALLOWED_GUILD_IDS:
-            print(f"Leaving unauthorized server: {guild.name} ({guild.id})")
+            log.warning("Leaving unauthorized server: %s (%s)", guild.name,
+                        guild.id)
             await guild.leave()
-    print("⏳ Caching hero data...")
-    # Ensure caching completes before setting up background task
-    success = await fetch_and_cache_hero_data()
-    if success:
-        print("✅ Hero data cache complete.")
+    if hasattr(bot, "hero_refresh_task"):
+        return  # Reconnect: caches and refresh task are already running
+    STARTUP.mark("connect")
+
+    if HERO_RECORDS:
+        # Warm start from the snapshot: revalidate in the background now
+        log.info("Hero data served from snapshot; revalidating...")
+        refresh_delay = 0
     else:
-        print("❌ Hero data cache failed on startup.")
+        log.info("Caching hero data...")
+        # Ensure caching completes before setting up background task
+        success = await fetch_and_cache_hero_data()
+        if success:
+            log.info("Hero data cache complete.")
+            refresh_delay = HERO_REFRESH_INTERVAL
+        else:
+            log.error("Hero data cache failed on startup; retrying in "
+                      "%ds.", HERO_RETRY_DELAY)
+            refresh_delay = HERO_RETRY_DELAY
+    record_time_to_ready()
 
     # Start background refresh task only once after initial caching
-    if not hasattr(bot, "hero_refresh_task"):
-        bot.hero_refresh_task = bot.loop.create_task(
-            background_hero_data_refresh()
-        )
-        print("DEBUG: Background hero refresh task scheduled.")
+    bot.hero_refresh_task = bot.loop.create_task(
+        background_hero_data_refresh(refresh_delay)
+    )
+    bot.rank_ingest_task = bot.loop.create_task(background_rank_ingestion())
+    bot.synergy_prefetch_task = bot.loop.create_task(
+        background_synergy_prefetch()
+    )
+    log.debug("Background refresh tasks scheduled.")
+
+
+@bot.listen("on_message")
+async def route_trivia_answer(message):
+    """Hand a message to its channel's trivia game, if one is running."""
+    TRIVIA_GAMES.dispatch(message)
 
 
 @bot.event
 async def on_guild_join(guild):
     if guild.id not in ALLOWED_GUILD_IDS:
-        print(
-            f"Bot was added to unauthorized server: {guild.name} "
-            f"({guild.id}). Leaving..."
-        )
+        log.warning("Bot was added to unauthorized server: %s (%s). "
+                    "Leaving...", guild.name, guild.id)
         await guild.leave()
     else:
-        print(f"Bot joined authorized server: {guild.name} ({guild.id})")
+        log.info("Bot joined authorized server: %s (%s)", guild.name,
+                 guild.id)
 
 
 # ====== Restrict Bot to Specific Guilds ======
@@ -268,10 +1114,7 @@ def guild_only():
 # ---- MLBB Command Group ----
 
 
-@bot.group(name="mlbb", invoke_without_command=True)
-@guild_only()
-async def mlbb(ctx):
-    """Main command group for MLBB features."""
+def menu_embed():
     embed = discord.Embed(
         title="🏆 Mobile Legends: Bang Bang Bot",
         description="Your ultimate companion for MLBB statistics and fun!",
@@ -280,7 +1123,7 @@ async def mlbb(ctx):
     embed.add_field(
         name="📊 Hero & Game Stats",
         value=(
-            "• `!mlbb ranks [rank] [days]` — Top 10 hero rankings\n"
+            "• `!mlbb ranks [rank] [days]` — Hero rankings, with pages\n"
             "• `!mlbb counter [hero]` — Top 3 counters for a hero\n"
             "• `!mlbb synergy [hero]` — Synergy & anti-synergy stats\n"
             "• `!mlbb pick` — Get a random hero suggestion\n"
@@ -302,29 +1145,57 @@ async def mlbb(ctx):
         ),
         inline=False,
     )
-    embed.set_footer(
-        text=(
-            f"Requested by {ctx.author.display_name} • "
-            "Use !mlbb help for more details."
-        )
+    return embed
+
+
+@bot.group(name="mlbb", invoke_without_command=True)
+@guild_only()
+async def mlbb(ctx):
+    """Main command group for MLBB features."""
+    payload = RESPONSES.memoize(
+        "mlbb", (), None, lambda: embed_payload(menu_embed())
     )
-    await ctx.send(embed=embed)
+    await ctx.send(embed=embed_from_payload(
+        payload,
+        f"Requested by {ctx.author.display_name} • "
+        "Use !mlbb help for more details.",
+    ))
+
+
+def parse_trivia_options(options):
+    """``("hard", "5")`` -> ``("hard", 5)``; raises ValueError."""
+    difficulty, rounds = None, 1
+    for option in options:
+        option = option.lower()
+        if option in DIFFICULTIES:
+            difficulty = option
+        elif option.isdigit() and 1 <= int(option) <= TRIVIA_MAX_ROUNDS:
+            rounds = int(option)
+        else:
+            raise ValueError(option)
+    return difficulty, rounds
 
 
 @mlbb.command(name="trivia")
 @commands.has_permissions(manage_messages=True)
-async def trivia(ctx):
+async def trivia(ctx, *options: str):
     """Start a MLBB trivia game (moderator-only)."""
     channel_id = ctx.channel.id
-    if ACTIVE_TRIVIA_GAME.get(channel_id):
+    try:
+        difficulty, rounds = parse_trivia_options(options)
+    except ValueError as e:
         await ctx.send(embed=discord.Embed(
-            title="❗ Trivia Already Running",
-            description="A trivia game is already active in this channel.",
+            title="❓ Unknown Option",
+            description=(
+                f"`{e}` isn't a difficulty or round count. Usage: "
+                f"`!mlbb trivia [{'|'.join(DIFFICULTIES)}] "
+                f"[rounds 1-{TRIVIA_MAX_ROUNDS}]`"
+            ),
             color=COLORS["error"]
         ))
         return
 
-    if not HERO_DETAILS_CACHE:
+    if not TRIVIA_BANK.pools[difficulty]:
         await ctx.send(embed=discord.Embed(
             title="⚠️ No Heroes Cached",
             description="Hero data is not loaded yet. Please try again later.",
@@ -332,156 +1203,78 @@ async def trivia(ctx):
         ))
         return
 
-    ACTIVE_TRIVIA_GAME[channel_id] = True
+    game = TRIVIA_GAMES.start(channel_id)
+    if game is None:
+        await ctx.send(embed=discord.Embed(
+            title="❗ Trivia Already Running",
+            description="A trivia game is already active in this channel.",
+            color=COLORS["error"]
+        ))
+        return
+
+    timeout = TRIVIA_ROUND_TIMEOUT if rounds == 1 else TRIVIA_SPEED_TIMEOUT
     try:
-        hero_id = random.choice(list(HERO_DETAILS_CACHE.keys()))
-        # Corrected path for hero_info in trivia command
-        hero_info = (
-            HERO_DETAILS_CACHE[hero_id]
-            .get("data", {})
-            .get("records", [{}])[0]
-            .get("data", {})
-        )
-        qtype = random.choice(
-            ["role", "lane", "background"]
-        )  # Define qtype here
-
-        correct_answer = None  # Initialize correct_answer
-        question_text = None    # Initialize question_text
-
-        if qtype == "role":
-            role = (
-                hero_info.get("hero", {})
-                .get("data", {})
-                .get("sortlabel", ["Unknown"])
-            )
-            correct_answer = role[0] if role else "Unknown"
-            hero_name = HERO_ID_TO_NAME_MAP.get(hero_id, "Unknown Hero")
-            question_text = (
-                f"Which **role** does **{hero_name}** primarily belong to?"
-            )
-        elif qtype == "lane":
-            lane = (
-                hero_info.get("hero", {})
-                .get("data", {})
-                .get("roadsortlabel", ["Unknown"])
+        for round_number in range(1, rounds + 1):
+            set_stage("question")
+            question = TRIVIA_DECKS.draw(TRIVIA_BANK, channel_id, difficulty)
+            if question is None:
+                # The bank was rebuilt without this difficulty mid-game
+                await ctx.send(embed=discord.Embed(
+                    title="⚠️ Out of Questions",
+                    description="No more questions are available right "
+                                "now, so the game ends here.",
+                    color=COLORS["error"]
+                ))
+                break
+            title = "MLBB Trivia" if rounds == 1 else (
+                f"MLBB Speed Trivia — Round {round_number}/{rounds}"
             )
-            correct_answer = lane[0] if lane else "Unknown"
-            hero_name = HERO_ID_TO_NAME_MAP.get(hero_id, "Unknown Hero")
-            question_text = (
-                f"Which **lane** is recommended for **{hero_name}**?"
+            embed = discord.Embed(
+                title=title,
+                description=question.text,
+                color=COLORS["info"]
             )
-        elif qtype == "background":
-            bg = clean_html_tags(hero_info.get("background", ""))
-            hero_name = HERO_ID_TO_NAME_MAP.get(hero_id, "Unknown Hero")
-
-            # Split background into sentences and try to pick one
-            sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', bg)
-                         if s.strip()]
-
-            if not sentences or len(bg) < 50:  # If no sentences or too short
-                qtype = "role"  # Fallback to role question
-                role = (
-                    hero_info.get("hero", {})
-                    .get("data", {})
-                    .get("sortlabel", ["Unknown"])
-                )
-                correct_answer = role[0] if role else "Unknown"
-                question_text = (
-                    f"Which **role** does **{hero_name}** primarily "
-                    f"belong to?"
-                )
-            else:
-                # Select a random sentence or a short excerpt
-                chosen_excerpt = random.choice(sentences)
-                if len(chosen_excerpt) > 150:  # Truncate long sentences
-                    chosen_excerpt = chosen_excerpt[:150] + "..."
-
-                correct_answer = hero_name.lower()
-                question_text = (f"I am thinking of a hero whose background "
-                                 f"story includes: \"*{chosen_excerpt}*\". "
-                                 f"Who is this hero?")
-        else:
-            correct_answer = "Unknown"
-            question_text = "Question type is unknown."
-
-        if not correct_answer or not question_text:
-            raise ValueError("Failed to generate trivia question.")
-
-        embed = discord.Embed(
-            title="MLBB Trivia",
-            description=question_text,
-            color=COLORS["info"]
-        )
-        await ctx.send(embed=embed)
-
-        def check(m):
-            return (
-                m.channel == ctx.channel and not m.author.bot
+            embed.set_footer(
+                text=f"{question.kind.title()} · "
+                     f"{question.difficulty.title()} · "
+                     f"{game.guesses_per_user} guesses each · {timeout}s"
             )
+            await ctx.send(embed=embed)
 
-        try:
-            msg = await ctx.bot.wait_for('message', timeout=30.0, check=check)
-            user_answer = msg.content.strip().lower()
-
-            similarity = fuzz.WRatio(user_answer, correct_answer.lower())
-            if similarity >= 85:
-                await ctx.send(
-                    embed=discord.Embed(
-                        title="🎉 Correct!",
-                        description=(
-                            f"{msg.author.mention} got it right! "
-                            f"The answer was **{correct_answer.title()}**."
-                        ),
-                        color=COLORS["success"]
-                    )
-                )
-            else:
-                await ctx.send(
-                    embed=discord.Embed(
-                        title="❌ Incorrect!",
-                        description=(
-                            f"Sorry, {msg.author.mention}, that's incorrect. "
-                            f"The correct answer was "
-                            f"**{correct_answer.title()}**."
-                        ),
-                        color=COLORS["error"]
-                    )
-                )
-        except asyncio.TimeoutError:
-            await ctx.send(
-                embed=discord.Embed(
+            winner = await game.ask(question, timeout)
+            set_stage("answer")
+            if winner is None:
+                await ctx.send(embed=discord.Embed(
                     title="⏰ Time's up!",
-                    description="No one answered in time!",
+                    description=(
+                        f"No one got it. The answer was "
+                        f"**{question.answer}**."
+                    ),
                     color=COLORS["error"]
-                )
-            )
-        except Exception as e:
-            await ctx.send(
-                embed=discord.Embed(
-                    title="⚠️ Error",
-                    description=f"An error occurred: {str(e)}",
-                    color=COLORS["error"]
-                )
-            )
-    except (KeyError, IndexError):
-        await ctx.send(embed=discord.Embed(
-            title="⚠️ Error",
-            description=(
-                "Failed to generate trivia question. Please try again."
-            ),
-            color=COLORS["error"]
-        ))
-    except ValueError as e:
-        await ctx.send(
-            embed=discord.Embed(
-                title="⚠️ Error",
-                description=f"Failed to generate trivia question: {e}",
-                color=COLORS["error"]
-            )
-        )
+                ))
+                continue
+            msg, seconds = winner
+            await ctx.send(embed=discord.Embed(
+                title="🎉 Correct!",
+                description=(
+                    f"{msg.author.mention} got it right in {seconds:.1f}s! "
+                    f"The answer was **{question.answer}**."
+                ),
+                color=COLORS["success"]
+            ))
+
+        if rounds > 1:
+            standings = game.standings()
+            await ctx.send(embed=discord.Embed(
+                title="🏁 Final Scores",
+                description="\n".join(
+                    f"**{place}.** {name} — {points}"
+                    for place, (name, points) in enumerate(standings, 1)
+                ) or "Nobody scored this time!",
+                color=COLORS["success"]
+            ))
     finally:
-        ACTIVE_TRIVIA_GAME[channel_id] = False
+        TRIVIA_GAMES.end(channel_id)
 
 
 @trivia.error
@@ -507,9 +1300,7 @@ async def trivia_error(ctx, error):
 
 # ---- Update Help Command ----
 
-@mlbb.command(name="help")
-async def help_command(ctx):
-    """Show detailed help and support for MLBB commands."""
+def help_embed():
     embed = discord.Embed(
         title="📚 MLBB Bot Help & Support",
         description=(
@@ -522,10 +1313,11 @@ async def help_command(ctx):
     embed.add_field(
         name="Hero & Game Stats",
         value=(
-            "`!mlbb ranks [rank] [days]` — Top 10 hero rankings.\n"
+            "`!mlbb ranks [rank] [days]` — Hero rankings, 10 per page.\n"
             "• `rank`: all, epic, legend, mythic, honor, glory\n"
             "• `days`: 7 or 30\n"
-            "Example: `!mlbb ranks mythic 30`\n"
+            "• `--sort win|pick|ban`, `--bottom`, `--min-pick 0.5`\n"
+            "Example: `!mlbb ranks mythic 30 --sort ban --bottom`\n"
             "`!mlbb counter [hero]` — Top 3 counters for a hero, "
             "with details.\n"
             "`!mlbb synergy [hero]` — Synergy & anti-synergy stats "
@@ -538,7 +1330,9 @@ async def help_command(ctx):
     embed.add_field(
         name="Fun & Utility",
         value=(
-            "`!mlbb trivia` — Start a MLBB trivia game *(moderator-only)*\n"
+            "`!mlbb trivia [easy|medium|hard] [rounds]` — Start a MLBB "
+            "trivia game; 2+ rounds is a scored speed game "
+            "*(moderator-only)*\n"
             "`!mlbb ping` — Check bot latency.\n"
             "`!mlbb uptime` — Show bot uptime.\n"
             "`!mlbb 8ball [question]` — Ask the Magic 8-Ball.\n"
@@ -556,7 +1350,16 @@ async def help_command(ctx):
         ),
         inline=False
     )
-    await ctx.send(embed=embed)
+    return embed
+
+
+@mlbb.command(name="help")
+async def help_command(ctx):
+    """Show detailed help and support for MLBB commands."""
+    payload = RESPONSES.memoize(
+        "help", (), None, lambda: embed_payload(help_embed())
+    )
+    await ctx.send(embed=embed_from_payload(payload))
 
 
 # ---- Hero Commands ----
@@ -588,13 +1391,12 @@ async def random_hero(ctx):
 
 @mlbb.command(name="counter")
 @commands.cooldown(1, 5, commands.BucketType.user)     # Per-user: 1 use per 5s
-@commands.cooldown(2, 10, commands.BucketType.default)  # Global: 2 uses per 10
 async def counter(ctx, *, hero_name: str = None):
     """
     Show top 3 counters for the specified hero using COUNTER_HERO_LIST and
     generalized reasoning. Prioritize by winrate using /api/hero-rank/.
     """
-    if not HERO_NAME_TO_ID_MAP or not HERO_DETAILS_CACHE:
+    if not HERO_NAME_TO_ID_MAP or not HERO_RECORDS:
         embed = discord.Embed(
             title="⚠️ Hero Data Not Cached",
             description="Hero data is not loaded yet. Please try again later.",
@@ -614,44 +1416,27 @@ async def counter(ctx, *, hero_name: str = None):
         await ctx.send(embed=embed)
         return
 
-    hero_key = hero_name.strip().lower()
-    hero_id = HERO_NAME_TO_ID_MAP.get(hero_key)
-
-    # Fuzzy match if not found
-    if not hero_id:
-        # Find the closest match from HERO_NAME_TO_ID_MAP keys
-        choices = list(HERO_NAME_TO_ID_MAP.keys())
-        match, score = process.extractOne(hero_key, choices)
-        if score >= 80:  # Accept if similarity is high enough
-            hero_id = HERO_NAME_TO_ID_MAP[match]
-            hero_display_name = HERO_ID_TO_NAME_MAP.get(hero_id, match.title())
-        else:
-            embed = discord.Embed(
-                title="⚠️ Hero Not Found",
-                description=(
-                    f"Hero '{hero_name}' not found. Check spelling.\n"
-                    "Try `!mlbb pick` for an example."
-                ),
-                color=COLORS["error"],
-            )
-            await ctx.send(embed=embed)
-            return
-    else:
-        hero_display_name = HERO_ID_TO_NAME_MAP.get(hero_id, hero_name.title())
-
-    # Find counters from COUNTER_HERO_LIST
-    hero_counters = COUNTER_HERO_LIST.get(hero_display_name)
-    if not hero_counters or not isinstance(hero_counters, dict):
-        embed = discord.Embed(
-            title=f"🛡️ No Counter Data for {hero_display_name}",
-            description="No counter data available for this hero.",
-            color=COLORS["info"],
-        )
-        await ctx.send(embed=embed)
+    # Exact name, alias, or indexed fuzzy match
+    set_stage("resolve")
+    match = HERO_RESOLVER.resolve(hero_name)
+    if not match:
+        await ctx.send(embed=hero_not_found_embed(
+            hero_name, "Try `!mlbb pick` for an example."
+        ))
+        return
+    hero_id = match[0]
+    hero_display_name = HERO_ID_TO_NAME_MAP.get(hero_id, hero_name.title())
+    footer = f"Requested by {ctx.author.display_name}"
+
+    data_version = (HERO_DATA_VERSION, WINRATE_VERSION)
+    payload = RESPONSES.get("counter", hero_id, data_version)
+    if payload is not None:
+        await ctx.send(embed=embed_from_payload(payload, footer))
         return
 
-    counters = hero_counters.get("weak_against", [])
-    if not counters:
+    # Counters are precomputed and sorted by winrate in COUNTER_TABLE
+    top_counters = COUNTER_TABLE.counters_for(hero_id)[:3]
+    if not top_counters:
         embed = discord.Embed(
             title=f"🛡️ No Counter Data for {hero_display_name}",
             description="No counter data available for this hero.",
@@ -660,127 +1445,44 @@ async def counter(ctx, *, hero_name: str = None):
         await ctx.send(embed=embed)
         return
 
-    # --- Fetch winrate data for prioritization ---
-    api_url = f"{BASE_API_URL}hero-rank/?rank=all&days=7"
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_url) as response:
-                response.raise_for_status()
-                json_data = await response.json()
-                hero_records = json_data.get("data", {}).get("records", [])
-    except Exception:
-        hero_records = []
-
-    # Build a mapping: hero name (lower) -> winrate
-    winrate_map = {}
-    for record in hero_records:
-        hero_data = record.get("data", {})
-        name = (
-            hero_data.get("main_hero", {})
-            .get("data", {})
-            .get("name", "")
-        )
-        win_rate = hero_data.get("main_hero_win_rate", 0)
-        if name:
-            winrate_map[name.strip().lower()] = win_rate
-
-    # Sort counters by winrate (descending), fallback to original order
-    def counter_sort_key(counter_name):
-        return winrate_map.get(counter_name.strip().lower(), 0)
-
-    sorted_counters = sorted(counters, key=counter_sort_key, reverse=True)
-    top_counters = sorted_counters[:3]
-
     embed = discord.Embed(
         title=f"🛡️ Top Counters for {hero_display_name}",
         color=COLORS["primary"],
     )
 
-    async def get_openai_reason(hero, counter):
-        prompt = (
-            f"In Mobile Legends, explain in 2-3 sentences why {counter} is a "
-            f"strong counter to {hero}. Focus on gameplay mechanics, skills, "
-            "and matchups. Avoid generic statements."
-        )
-        try:
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
-                temperature=0.7,
-            )
-            return response.choices[0].message.content.strip()
-        except Exception:
-            return "No detailed reason available."
-
-    def get_group_reason(counter_hero):
-        for group in counter_groups.values():
-            if "heroes" in group and any(
-                h.lower() == counter_hero.lower() for h in group["heroes"]
-            ):
-                return group["reason"]
-        return None
+    # Counter-specific explanations: cached ones are used as-is; counters
+    # without a usable group reason are generated concurrently, within
+    # the latency budget.
+    missing = [
+        (entry["name"], entry["explanation_version"])
+        for entry in top_counters
+        if not entry["reason"] or len(entry["reason"]) < 15
+    ]
+    set_stage("explain")
+    explanations = await EXPLANATIONS.explain(
+        hero_display_name, missing, COUNTER_EXPLANATION_BUDGET
+    )
+    set_stage("render")
 
     # Show up to 3 counters
-    for idx, counter_hero in enumerate(top_counters, 1):
-        counter_id = HERO_NAME_TO_ID_MAP.get(counter_hero.lower())
-        counter_name = counter_hero
-
-        # Ensure counter_id is not None before proceeding to fetch details
-        if not counter_id:
-            print(f"DEBUG: Skipping counter '{counter_name}' as its ID was "
-                  f"not found in cache.")
-            continue  # Skip this counter if its ID isn't in the map
-
-        counter_full_data = HERO_DETAILS_CACHE.get(counter_id, {})
-
-        # Corrected path to the nested hero data within the full detail JSON
-        hero_details_for_counter = (
-            counter_full_data.get("data", {})
-            .get("records", [{}])[0]
-            .get("data", {})
-        )
-
-        role = (
-            hero_details_for_counter.get("hero", {})
-            .get("data", {})
-            .get("sortlabel", ["Unknown"])[0]
-            if hero_details_for_counter.get("hero", {})
-            .get("data", {})
-            .get("sortlabel") else "Unknown"
+    for idx, entry in enumerate(top_counters, 1):
+        counter_name = entry["name"]
+        specialties = ", ".join(entry["specialties"]) or "Unknown"
+
+        # Prefer a pair-specific explanation, then the group reason from
+        # generalised_counter_reasoning
+        reason = (
+            explanations.get(counter_name)
+            or EXPLANATIONS.get(hero_display_name, counter_name,
+                                entry["explanation_version"])
+            or entry["reason"]
+            or "No detailed reason available."
         )
-        specialties = (
-            ", ".join(hero_details_for_counter.get("hero", {})
-                      .get("data", {})
-                      .get("speciality", []))
-            if hero_details_for_counter.get("hero", {})
-            .get("data", {})
-            .get("speciality") else "Unknown"
-        )
-
-        # Try to get a reason from generalised_counter_reasoning
-        reason = get_group_reason(counter_name)
-
-        # If not found, use OpenAI
-        if not reason or len(reason) < 15:
-            reason = await get_openai_reason(hero_display_name, counter_name)
 
         # Skills summary (show up to 2, only names)
-        skills_to_display = []
-        # Correct path to heroskilllist within the cached hero_info
-        heroskilllist = (
-            hero_details_for_counter.get("hero", {})
-            .get("data", {})
-            .get("heroskilllist", [])
-        )
-        for group in heroskilllist:
-            for skill in group.get("skilllist", []):
-                if len(skills_to_display) >= 2:
-                    break
-                skill_name = skill.get("skillname", "Skill")
-                skills_to_display.append(f"• {skill_name}")
-            if len(skills_to_display) >= 2:
-                break
+        skills_to_display = [
+            f"• {skill_name}" for skill_name in entry["skill_names"]
+        ]
 
         attributes_summary = (
             f"Key Counter Attributes: {specialties}"
@@ -797,146 +1499,206 @@ async def counter(ctx, *, hero_name: str = None):
              else "No skill data.")
         )
 
-        field_name = f"#{idx} {counter_name} ({role})"
+        field_name = f"#{idx} {counter_name} ({entry['role']})"
         embed.add_field(name=field_name, value=field_value, inline=False)
 
-    embed.set_footer(text=f"Requested by {ctx.author.display_name}")
+    # Explanations still generating in the background would improve the
+    # reply, so only a complete one is reused
+    if len(explanations) == len(missing) or not openai_configured():
+        RESPONSES.put("counter", hero_id, data_version,
+                      embed_payload(embed))
+    embed.set_footer(text=footer)
     await ctx.send(embed=embed)
 
 
+def parse_ranks_options(options):
+    """Parse ``!mlbb ranks`` arguments into a dict of settings.
+
+    Unknown ranks and day windows fall back to the defaults, as before;
+    malformed ``--`` options raise ValueError with a user-facing message.
+    """
+    settings = {
+        "rank": "all", "days": 7, "metric": "win", "bottom": False,
+        "min_pick": None,
+    }
+    tokens = iter(options)
+    for token in tokens:
+        lowered = token.lower()
+        if lowered == "--sort":
+            metric = metric_name(next(tokens, ""))
+            if metric is None:
+                raise ValueError("`--sort` takes one of: win, pick, ban.")
+            settings["metric"] = metric
+        elif lowered in ("--bottom", "--top"):
+            settings["bottom"] = lowered == "--bottom"
+        elif lowered == "--min-pick":
+            try:
+                settings["min_pick"] = (
+                    float(next(tokens, "").rstrip("%")) / 100
+                )
+            except ValueError:
+                raise ValueError(
+                    "`--min-pick` takes a percentage, e.g. `--min-pick 0.5`."
+                )
+        elif lowered.startswith("--"):
+            raise ValueError(f"Unknown option `{token}`.")
+        elif lowered.isdigit():
+            if int(lowered) in RANK_DAY_WINDOWS:
+                settings["days"] = int(lowered)
+        elif lowered in RANK_FILTERS:
+            settings["rank"] = lowered
+    return settings
+
+
 @mlbb.command(name="ranks")
 @commands.cooldown(1, 5, commands.BucketType.user)    # Per-user: 1 use per 5s
-@commands.cooldown(2, 10, commands.BucketType.default)  # Global: 2 uses per 10
-async def ranks(ctx, rank_filter: str = "all", days_filter: int = 7):
+async def ranks(ctx, *options: str):
     """
-    Show top 10 hero rankings.
-    Usage: !mlbb ranks [rank_filter] [days_filter]
+    Show paginated hero rankings by win, pick or ban rate.
+    Usage: !mlbb ranks [rank_filter] [days_filter] [--sort win|pick|ban]
+           [--bottom] [--min-pick PERCENT]
     """
-    valid_ranks = ["all", "epic", "legend", "mythic", "honor", "glory"]
-    if rank_filter.lower() not in valid_ranks:
-        rank_filter = "all"
-    if days_filter not in [7, 30]:
-        days_filter = 7
-
-    api_url = (
-        f"{BASE_API_URL}hero-rank/?rank={rank_filter.lower()}"
-        f"&days={days_filter}"
-    )
-
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_url) as response:
-                response.raise_for_status()
-                json_data = await response.json()
-                api_status = json_data.get("code")
-                hero_records = json_data.get("data", {}).get("records")
-
-                if api_status != 0 or hero_records is None:
-                    err_msg = json_data.get("message", "No message from API.")
-                    error_desc = (
-                        (
-                            (
-                                "The API reported an issue in data.\n"
-                                f"Message: {err_msg}"
-                            )
-                        )
-                    )
-                    error_embed = discord.Embed(
-                        title="⚠️ Data Retrieval Issue",
-                        description=error_desc,
-                        color=COLORS["error"],
-                    )
-                    await ctx.send(embed=error_embed)
-                    return
-
-                if not hero_records:
-                    title_rank_filter = (
-                        rank_filter.capitalize()
-                        if rank_filter.lower() != "all"
-                        else "All Ranks"
-                    )
-                    embed_title = (
-                        f"🏆 Top 10 Heroes - {title_rank_filter} "
-                        f"({days_filter} Days)"
-                    )
-                    embed = discord.Embed(
-                        title=embed_title,
-                        description="No hero ranking data available.",
-                        color=COLORS.get(
-                            rank_filter.lower(), COLORS["primary"]
-                        ),
-                    )
-                    await ctx.send(embed=embed)
-                    return
-                embed_color = COLORS.get(
-                    rank_filter.lower(), COLORS["primary"]
-                )
+        settings = parse_ranks_options(options)
+    except ValueError as e:
+        await ctx.send(embed=discord.Embed(
+            title="⚠️ Invalid Ranks Option",
+            description=(
+                f"{e}\nExample: `!mlbb ranks mythic 30 --sort ban --bottom`"
+            ),
+            color=COLORS["error"],
+        ))
+        return
+    rank_filter = settings["rank"]
+    days_filter = settings["days"]
+    metric = settings["metric"]
+
+    cache_key = (rank_filter, days_filter)
+    set_stage("fetch")
+    needs_token = HERO_RANK_CACHE.needs_load(cache_key)
+    if needs_token and not await reserve_upstream(ctx):
+        return
+    try:
+        with holding_token(needs_token):
+            table = await HERO_RANK_CACHE.get(cache_key)
 
-                if rank_filter.lower() != "all":
-                    title_rank_filter = rank_filter.capitalize()
-                else:
-                    title_rank_filter = "All Ranks"
-                embed_title = (
-                    (
-                        f"🏆 Top 10 Heroes - {title_rank_filter} "
-                        f"({days_filter} Days)"
-                    )
+        title_rank_filter = (
+            rank_filter.capitalize() if rank_filter != "all" else "All Ranks"
+        )
+        embed_title = (
+            f"🏆 Hero Rankings - {title_rank_filter} ({days_filter} Days)"
+        )
+        embed_color = COLORS.get(rank_filter, COLORS["primary"])
+
+        if not len(table):
+            embed = discord.Embed(
+                title=embed_title,
+                description="No hero ranking data available.",
+                color=embed_color,
+            )
+            await ctx.send(embed=embed)
+            return
+
+        # Sorted orders and rendered pages are reused until this table is
+        # replaced by a refresh or ingestion
+        stamp = HERO_RANK_CACHE.stamp(cache_key, table)
+        leaderboard_key = (
+            rank_filter, days_filter, metric, settings["bottom"],
+            settings["min_pick"], stamp,
+        ) if stamp is not None else None
+
+        def sort_table():
+            set_stage("sort")
+            description = (
+                f"*Sorted by {METRICS[metric][1]} "
+                f"({'Ascending' if settings['bottom'] else 'Descending'})*"
+            )
+            mask = None
+            if settings["min_pick"] is not None:
+                mask = table.mask("pick", minimum=settings["min_pick"])
+                description += (
+                    f"\n*Pick rate at least {settings['min_pick']:.2%}*"
                 )
-                embed_description = "*Sorted by Win Rate (Descending)*"
+            return (
+                table.sort(metric, ascending=settings["bottom"], mask=mask),
+                description,
+            )
 
-                embed = discord.Embed(
-                    title=embed_title,
-                    description=embed_description,
-                    color=embed_color,
+        # Pages are cut from this one ordering of the captured table, so
+        # flipping stays consistent even after a newer ingestion lands.
+        order, embed_description = RESPONSES.memoize(
+            "ranks", leaderboard_key, RANK_SNAPSHOT_VERSION, sort_table
+        )
+        page_count = max(1, -(-len(order) // LEADERBOARD_PAGE_SIZE))
+        medals = ["🥇", "🥈", "🥉"]
+
+        def render_page(page):
+            embed = discord.Embed(
+                title=embed_title,
+                description=embed_description,
+                color=embed_color,
+            )
+            start = page * LEADERBOARD_PAGE_SIZE
+            rank_display_list = []
+            for idx, row in enumerate(
+                table.rows(order[start:start + LEADERBOARD_PAGE_SIZE]),
+                start,
+            ):
+                rank_prefix = (
+                    medals[idx] if idx < 3 and not settings["bottom"]
+                    else f"`#{idx + 1:02}`"
+                )
+                rank_display_list.append(
+                    f"{rank_prefix} **{row['name']}**\n"
+                    f" ▸ WR: `{row['win']:.2%}` \u200b | "
+                    f"PR: `{row['pick']:.2%}` "
+                    f"\u200b | BR: `{row['ban']:.2%}`"
                 )
-                rank_display_list = []
-                medals = ["🥇", "🥈", "🥉"]
-
-                for idx, record in enumerate(hero_records[:10]):
-                    hero_data = record.get("data")
-                    if hero_data:
-                        name = (
-                            hero_data.get("main_hero", {})
-                            .get("data", {})
-                            .get("name", "Unknown")
-                        )
-                        win_rate = hero_data.get("main_hero_win_rate", 0)
-                        pick_rate = hero_data.get(
-                            "main_hero_appearance_rate", 0
-                        )
-                        ban_rate = hero_data.get("main_hero_ban_rate", 0)
-
-                        rank_prefix = (
-                            medals[idx] if idx < 3 else f"`#{idx + 1:02}`"
-                        )
-
-                        hero_entry = (
-                            f"{rank_prefix} **{name}**\n"
-                            f" ▸ WR: `{win_rate:.2%}` \u200b | "
-                            f"PR: `{pick_rate:.2%}` "
-                            f"\u200b | BR: `{ban_rate:.2%}`"
-                        )
-                        rank_display_list.append(hero_entry)
-
-                if rank_display_list:
-                    embed.add_field(
-                        name="Hero Stats",
-                        value="\n\n".join(rank_display_list),
-                        inline=False,
-                    )
-                else:
-                    embed.add_field(
-                        name="No Data",
-                        value="Could not format hero data.",
-                        inline=False,
-                    )
 
-                footer_text = (
-                    f"Requested by {ctx.author.display_name}"
+            if rank_display_list:
+                embed.add_field(
+                    name="Hero Stats",
+                    value="\n\n".join(rank_display_list),
+                    inline=False,
+                )
+            else:
+                embed.add_field(
+                    name="No Data",
+                    value="No heroes match these filters.",
+                    inline=False,
                 )
-                embed.set_footer(text=footer_text)
-                await ctx.send(embed=embed)
+            return embed_payload(embed)
+
+        def render(page):
+            payload = RESPONSES.memoize(
+                "ranks",
+                (leaderboard_key, page) if leaderboard_key else None,
+                RANK_SNAPSHOT_VERSION, lambda: render_page(page),
+            )
+            return embed_from_payload(
+                payload,
+                f"Page {page + 1}/{page_count} • "
+                f"Requested by {ctx.author.display_name}",
+            )
+
+        set_stage("render")
+        if page_count == 1:
+            await ctx.send(embed=render(0))
+            return
+        view = PaginatorView(
+            render, page_count, ctx.author.id,
+            timeout=LEADERBOARD_VIEW_TIMEOUT,
+        )
+        view.message = await ctx.send(embed=render(0), view=view)
+        LEADERBOARD_VIEWS.register(view)
 
+    except HeroRankError as e:
+        error_embed = discord.Embed(
+            title="⚠️ Data Retrieval Issue",
+            description=f"The API reported an issue in data.\nMessage: {e}",
+            color=COLORS["error"],
+        )
+        await ctx.send(embed=error_embed)
     except aiohttp.ClientResponseError as e:
         error_embed = discord.Embed(
             title="⚠️ API Request Error (Ranks)",
@@ -959,7 +1721,7 @@ async def ranks(ctx, rank_filter: str = "all", days_filter: int = 7):
         )
         await ctx.send(embed=error_embed)
     except Exception as e:
-        print(f"An unexpected error occurred in ranks command: {e}")
+        log.exception("Unexpected error in ranks command")
         error_embed = discord.Embed(
             title="⚠️ Oops! Something Went Wrong (Ranks)",
             description=f"An unexpected error occurred: {str(e)}",
@@ -970,14 +1732,13 @@ async def ranks(ctx, rank_filter: str = "all", days_filter: int = 7):
 
 @mlbb.command(name="synergy")
 @commands.cooldown(1, 5, commands.BucketType.user)     # Per-user: 1 use per 5s
-@commands.cooldown(2, 15, commands.BucketType.default)  # Global: 2 uses per 15
 async def mlbb_synergy(ctx, *, hero_name: str = None):
     """
     Show advanced synergy and anti-synergy stats for a hero, including
     best/worst partners, win/appearance rates, and time-segment trends.
     Usage: !mlbb synergy [hero]
     """
-    if not HERO_NAME_TO_ID_MAP or not HERO_DETAILS_CACHE:
+    if not HERO_NAME_TO_ID_MAP or not HERO_RECORDS:
         await ctx.send(embed=discord.Embed(
             title="⚠️ Hero Data Not Cached",
             description="Hero data is not loaded yet. Please try again later.",
@@ -995,32 +1756,23 @@ async def mlbb_synergy(ctx, *, hero_name: str = None):
         ))
         return
 
-    hero_key = hero_name.strip().lower()
-    hero_id = HERO_NAME_TO_ID_MAP.get(hero_key)
-
-    # Fuzzy match if not found
-    if not hero_id:
-        choices = list(HERO_NAME_TO_ID_MAP.keys())
-        match, score = process.extractOne(hero_key, choices)
-        if score >= 80:
-            hero_id = HERO_NAME_TO_ID_MAP[match]
-            hero_display_name = HERO_ID_TO_NAME_MAP.get(hero_id, match.title())
-        else:
-            await ctx.send(embed=discord.Embed(
-                title="⚠️ Hero Not Found",
-                description=f"Hero '{hero_name}' not found. Check spelling.",
-                color=COLORS["error"],
-            ))
-            return
-    else:
-        hero_display_name = HERO_ID_TO_NAME_MAP.get(hero_id, hero_name.title())
+    # Exact name, alias, or indexed fuzzy match
+    set_stage("resolve")
+    match = HERO_RESOLVER.resolve(hero_name)
+    if not match:
+        await ctx.send(embed=hero_not_found_embed(hero_name))
+        return
+    hero_id = match[0]
+    hero_display_name = HERO_ID_TO_NAME_MAP.get(hero_id, hero_name.title())
 
-    api_url = f"{BASE_API_URL}hero-detail-stats/{hero_id}/"
+    SYNERGY_POPULARITY.record(hero_id)
+    set_stage("fetch")
+    needs_token = SYNERGY_CACHE.needs_load(hero_id)
+    if needs_token and not await reserve_upstream(ctx):
+        return
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_url) as response:
-                response.raise_for_status()
-                json_data = await response.json()
+        with holding_token(needs_token):
+            hero_stats = await SYNERGY_CACHE.get(hero_id)
     except Exception as e:
         await ctx.send(embed=discord.Embed(
             title="⚠️ API Error",
@@ -1029,8 +1781,7 @@ async def mlbb_synergy(ctx, *, hero_name: str = None):
         ))
         return
 
-    records = json_data.get("data", {}).get("records", [])
-    if not records:
+    if not hero_stats:
         await ctx.send(embed=discord.Embed(
             title="⚠️ No Synergy Data",
             description="No synergy data found for this hero.",
@@ -1038,21 +1789,31 @@ async def mlbb_synergy(ctx, *, hero_name: str = None):
         ))
         return
 
-    hero_stats = records[0]["data"]
-    main_win = hero_stats.get("main_hero_win_rate", 0)
-    main_pick = hero_stats.get("main_hero_appearance_rate", 0)
-    main_ban = hero_stats.get("main_hero_ban_rate", 0)
-    sub_hero = hero_stats.get("sub_hero", [])
-    sub_hero_last = hero_stats.get("sub_hero_last", [])
+    # Reused until the synergy entry is refreshed or hero names change
+    stamp = SYNERGY_CACHE.stamp(hero_id, hero_stats)
+    payload = RESPONSES.memoize(
+        "synergy", (hero_id, stamp) if stamp is not None else None,
+        HERO_DATA_VERSION,
+        lambda: render_synergy(hero_display_name, hero_stats),
+    )
+    await ctx.send(embed=embed_from_payload(
+        payload, f"Requested by {ctx.author.display_name}"
+    ))
+
+
+def render_synergy(hero_display_name, hero_stats):
+    """Synergy embed payload for one hero (without the footer)."""
+    set_stage("render")
+    main_win = hero_stats["main_hero_win_rate"]
+    main_pick = hero_stats["main_hero_appearance_rate"]
+    main_ban = hero_stats["main_hero_ban_rate"]
+    sub_hero = hero_stats["sub_hero"]
+    sub_hero_last = hero_stats["sub_hero_last"]
 
     def format_time_segments(h):
         # Collect all min_win_rate* fields
         segments = []
-        for k in [
-            "min_win_rate6_8", "min_win_rate8_10", "min_win_rate10_12",
-            "min_win_rate12_14", "min_win_rate14_16", "min_win_rate16_18",
-            "min_win_rate18_20", "min_win_rate20"
-        ]:
+        for k in SYNERGY_TIME_SEGMENTS:
             if k in h:
                 segments.append(f"`{k[12:].replace('_', '-')}`: {h[k]:.2%}")
         return " | ".join(segments) if segments else "No time-segment data."
@@ -1120,9 +1881,7 @@ async def mlbb_synergy(ctx, *, hero_name: str = None):
             value="No anti-synergy data.",
             inline=False,
         )
-
-    embed.set_footer(text=f"Requested by {ctx.author.display_name}")
-    await ctx.send(embed=embed)
+    return embed_payload(embed)
 
 
 @mlbb.command(name="roast")
@@ -1174,10 +1933,7 @@ async def roast(ctx, member: discord.Member = None):
     await ctx.send(embed=embed)
 
 
-@mlbb.command(name="crazy")
-@commands.cooldown(1, 10, commands.BucketType.user)  # 1 use per 10 seconds per
-async def mlbb_crazy(ctx):
-    """Responds with the 'crazy' copypasta."""
+def crazy_text():
     lines = [
         "Crazy?",
         "I was crazy once",
@@ -1186,7 +1942,14 @@ async def mlbb_crazy(ctx):
         "A rubber room with rats",
         "And rats make me crazy!"
     ]
-    await ctx.send("\n".join(lines))
+    return "\n".join(lines)
+
+
+@mlbb.command(name="crazy")
+@commands.cooldown(1, 10, commands.BucketType.user)  # 1 use per 10 seconds per
+async def mlbb_crazy(ctx):
+    """Responds with the 'crazy' copypasta."""
+    await ctx.send(RESPONSES.memoize("crazy", (), None, crazy_text))
 
 
 @mlbb.command(name="8ball")
@@ -1399,12 +2162,68 @@ async def mlbb_ping(ctx):
     )
     await ctx.send(embed=embed)
 
+
+@mlbb.command(name="loopstats")
+@commands.check_any(
+    commands.is_owner(), commands.has_permissions(administrator=True)
+)
+async def mlbb_loopstats(ctx):
+    """Show event-loop lag and the slowest callbacks (admin-only)."""
+    detector = SLOW_CALLBACK_DETECTOR
+    embed = discord.Embed(
+        title="🩺 Event Loop Health",
+        description=(
+            f"Lag now `{LOOP_MONITOR.last_lag * 1000:.1f} ms` | "
+            f"p50 `{LOOP_MONITOR.percentile(0.5) * 1000:.1f} ms` | "
+            f"p95 `{LOOP_MONITOR.percentile(0.95) * 1000:.1f} ms` | "
+            f"max `{LOOP_MONITOR.max_lag * 1000:.1f} ms`\n"
+            f"Callbacks over `{detector.threshold * 1000:.0f} ms`: "
+            f"**{detector.total}**"
+        ),
+        color=COLORS["info"],
+    )
+    offenders = [
+        f"`{count}×` {command or '-'} / {stage_name or '-'} — `{callback}`"
+        for (command, stage_name, callback), count
+        in detector.offenders.most_common(5)
+    ]
+    embed.add_field(
+        name="Top Offenders (command / stage)",
+        value="\n".join(offenders) or "None so far.",
+        inline=False,
+    )
+    recent = [
+        f"<t:{int(event['at'])}:R> `{event['duration_ms']:.0f} ms` "
+        f"{event['command'] or '-'} / {event['stage'] or '-'}"
+        for event in reversed(list(detector.recent)[-5:])
+    ]
+    embed.add_field(
+        name="Most Recent",
+        value="\n".join(recent) or "None so far.",
+        inline=False,
+    )
+    await ctx.send(embed=embed)
+
+
+@mlbb_loopstats.error
+async def loopstats_error(ctx, error):
+    if isinstance(error, commands.CheckFailure):
+        await ctx.send(embed=discord.Embed(
+            title="⛔ Admins Only",
+            description="`!mlbb loopstats` is limited to server admins.",
+            color=COLORS["error"],
+        ))
+
+STARTUP.mark("module_init")
+
+
 # =========================
 # Run the Bot
 # =========================
 
 if __name__ == "__main__":
     if TOKEN is None:
-        print("❌ DISCORD_TOKEN not found in environment variables.")
+        log.error("DISCORD_TOKEN not found in environment variables.")
     else:
-        bot.run(TOKEN)
+        # discord.py logs through our JSON pipeline instead of its own
+        bot.run(TOKEN, log_handler=None)
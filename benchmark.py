@@ -0,0 +1,350 @@
+# Offline benchmark suite for the bot, against a local fake MLBB API.
+#
+# Measures import time (per module, with ``python -X importtime``),
+# cold-start crawl and ingestion, a refresh of unchanged data,
+# snapshot warm start, per-command latency for counter/ranks/synergy/trivia
+# (through the real command pipeline, see synthetic_discord.py) and peak
+# memory. Results are one JSON document, so runs of two versions can be
+# compared:
+#
+#   python benchmark.py --output before.json
+#   python benchmark.py --output after.json --compare before.json
+#
+# The fake API options (latency, jitter, error injection, fixtures) are
+# described by ``python benchmark.py --help``.
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bot_logging import configure_logging
+from fake_mlbb_api import add_server_arguments, server_from_args
+import synthetic_discord
+
+
+SCHEMA_VERSION = 1
+COMMANDS = ("counter", "ranks", "synergy", "trivia")
+RANKS_OPTIONS = (
+    "", "mythic", "legend 30", "all 7 --sort pick", "epic --sort ban",
+    "glory 30 --bottom", "honor --min-pick 0.5",
+)
+
+
+def summarize(latencies):
+    """Latency distribution in milliseconds."""
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def pct(fraction):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pct(0.5) * 1000, 3),
+        "p95_ms": round(pct(0.95) * 1000, 3),
+        "p99_ms": round(pct(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def import_bot(base_url, workdir, args):
+    """Import Main against the fake API, with throwaway cache files."""
+    os.environ.update({
+        "MLBB_API_URL": base_url,
+        "UPSTREAM_RATE_LIMIT": str(args.upstream_rate),
+        "UPSTREAM_BURST": str(args.upstream_burst),
+        "HERO_SNAPSHOT_PATH": os.path.join(workdir, "hero_snapshot.json.gz"),
+        "EXPLANATION_CACHE_PATH": os.path.join(workdir, "explanations.json"),
+        "METRICS_PORT": "0",
+        "LOG_LEVEL": args.log_level,
+        # Never call OpenAI; load_dotenv() won't override these
+        "OPENAI_API_KEY": "",
+        "DISCORD_TOKEN": "",
+    })
+    return importlib.import_module("Main")
+
+
+def profile_imports():
+    """Import Main in a fresh interpreter under ``-X importtime``.
+
+    Returns the total import time, the cumulative time of each module Main
+    imports directly, and Main's own startup phases. Run after import_bot,
+    so the environment (and the static data artifact) is in place.
+    """
+    script = ("import json, Main; "
+              "print(json.dumps(Main.STARTUP.phases))")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode:
+        return {"ok": False}
+    total_us, children, direct = 0, {}, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue                       # The header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth == 1:
+            children[name] = int(cumulative) / 1000
+        elif depth == 0:
+            if name == "Main":
+                total_us = int(cumulative)
+                direct = children
+            children = {}
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "ok": True,
+        "import_ms": round(total_us / 1000, 3),
+        "modules_ms": {name: round(ms, 3) for name, ms in
+                       sorted(direct.items(), key=lambda item: -item[1])},
+        "phases_ms": {phase: round(seconds * 1000, 3)
+                      for phase, seconds in phases.items()},
+    }
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - started
+
+
+class CommandDriver:
+    """Runs !mlbb commands through the bot as synthetic users."""
+
+    def __init__(self, bot, guild_id, hero_names, trivia_games):
+        self.bot = bot
+        self.guild = synthetic_discord.SyntheticGuild(guild_id)
+        self.hero_names = hero_names
+        self.trivia_games = trivia_games
+        self._turn = 0
+
+    def content_for(self, command):
+        self._turn += 1
+        if command in ("counter", "synergy"):
+            hero = self.hero_names[self._turn % len(self.hero_names)]
+            return f"!mlbb {command} {hero}"
+        if command == "ranks":
+            options = RANKS_OPTIONS[self._turn % len(RANKS_OPTIONS)]
+            return f"!mlbb ranks {options}".rstrip()
+        return f"!mlbb {command}"
+
+    async def run(self, command, user=None):
+        """Invoke ``command`` once; returns ``(ctx, seconds)``.
+
+        Each call uses a fresh user and channel unless given, so per-user
+        cooldowns and one-game-per-channel trivia don't interfere.
+        """
+        user = user or synthetic_discord.SyntheticUser()
+        channel = synthetic_discord.SyntheticChannel(self.guild)
+        answer = None
+        if command == "trivia":
+            answer = asyncio.ensure_future(self._answer_trivia(user, channel))
+        try:
+            return await timed(synthetic_discord.invoke(
+                self.bot, self.content_for(command), user, channel
+            ))
+        finally:
+            if answer is not None:
+                answer.cancel()
+
+    async def _answer_trivia(self, user, channel):
+        """One wrong guess, then the right answer."""
+        await channel.wait_for_reply()
+        game = self.trivia_games.get(channel.id)
+        if game is None or game.question is None:
+            return
+        synthetic_discord.post(self.bot, "?", user, channel)
+        synthetic_discord.post(
+            self.bot, game.question.accepted[0], user, channel
+        )
+
+
+async def run_benchmark(args):
+    results = {}
+    api = server_from_args(args)
+    base_url = await api.start()
+    workdir = tempfile.mkdtemp(prefix="mlbb-bench-")
+    if args.trace_memory:
+        tracemalloc.start()
+    Main = import_bot(base_url, workdir, args)
+    results["startup"] = profile_imports()
+    try:
+        await Main.UPSTREAM.start()
+
+        # Cold start: empty caches, every hero detail and rank window
+        requests_before = api.stats["requests"]
+        ok, hero_data_s = await timed(Main.fetch_and_cache_hero_data())
+        ingested, hero_ranks_s = await timed(Main.ingest_hero_ranks())
+        results["cold_start"] = {
+            "ok": bool(ok and ingested),
+            "hero_data_s": round(hero_data_s, 4),
+            "hero_ranks_s": round(hero_ranks_s, 4),
+            "total_s": round(hero_data_s + hero_ranks_s, 4),
+            "heroes": len(Main.HERO_RECORDS),
+            "upstream_requests": api.stats["requests"] - requests_before,
+        }
+
+        # Refresh of unchanged data (conditional requests / hashes)
+        requests_before = api.stats["requests"]
+        not_modified_before = api.stats["not_modified"]
+        ok, refresh_s = await timed(Main.fetch_and_cache_hero_data())
+        results["refresh"] = {
+            "ok": bool(ok),
+            "total_s": round(refresh_s, 4),
+            "upstream_requests": api.stats["requests"] - requests_before,
+            "not_modified": api.stats["not_modified"] - not_modified_before,
+        }
+
+        started = time.perf_counter()
+        loaded = Main.load_hero_snapshot()
+        results["snapshot_load"] = {
+            "ok": bool(loaded),
+            "total_s": round(time.perf_counter() - started, 4),
+        }
+
+        # Per-command latency through the full command pipeline
+        await synthetic_discord.attach(Main.bot)
+        driver = CommandDriver(
+            Main.bot, Main.ALLOWED_GUILD_IDS[0],
+            sorted(Main.HERO_ID_TO_NAME_MAP.values()), Main.TRIVIA_GAMES,
+        )
+        results["commands"] = {}
+        for command in args.commands:
+            latencies = []
+            failures = 0
+            for _ in range(args.iterations):
+                ctx, seconds = await driver.run(command)
+                latencies.append(seconds)
+                failures += bool(ctx.command_failed or ctx.error)
+            summary = summarize(latencies)
+            summary["first_ms"] = round(latencies[0] * 1000, 3)
+            summary["failures"] = failures
+            results["commands"][command] = summary
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        results["memory"] = {
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            "peak_rss_kib": (usage.ru_maxrss // 1024
+                             if sys.platform == "darwin"
+                             else usage.ru_maxrss),
+        }
+        if args.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            results["memory"]["traced_current_kib"] = current // 1024
+            results["memory"]["traced_peak_kib"] = peak // 1024
+        results["upstream"] = dict(api.stats)
+    finally:
+        await Main.UPSTREAM.close()
+        await api.stop()
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": api.source,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "etags": args.etags,
+            "upstream_rate": args.upstream_rate,
+            "upstream_burst": args.upstream_burst,
+            "iterations": args.iterations,
+            "trace_memory": args.trace_memory,
+        },
+        "results": results,
+    }
+
+
+def flatten(results, prefix=""):
+    """``{"commands.counter.p50_ms": 1.2, ...}`` for numeric results."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current):
+    """Lines describing how every shared metric changed."""
+    before = flatten(baseline["results"])
+    after = flatten(current["results"])
+    lines = [f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}"]
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        change = f"{(new - old) / old:+.1%}" if old else "n/a"
+        lines.append(f"{name:<40} {old:>12g} {new:>12g} {change:>9}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the bot against a local fake MLBB API."
+    )
+    add_server_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=50,
+                        help="invocations per command")
+    parser.add_argument("--commands", nargs="+", choices=COMMANDS,
+                        default=list(COMMANDS))
+    parser.add_argument("--upstream-rate", type=float, default=1000.0,
+                        help="bot's upstream rate limit; the default is "
+                             "high so limiter waits don't hide handler cost")
+    parser.add_argument("--upstream-burst", type=int, default=1000)
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report tracemalloc peaks (slower)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write JSON here (default stdout)")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="print changes against an earlier result file")
+    args = parser.parse_args()
+
+    # Keep stdout for the results; the bot's logs go to stderr
+    configure_logging(args.log_level, stream=sys.stderr)
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, report)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
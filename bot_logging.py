@@ -0,0 +1,141 @@
+# Structured JSON logging that never blocks the event loop.
+#
+# Log calls only format a JSON line and put it on an in-memory queue; a
+# background thread does the actual (possibly slow) stdout writes. When
+# the queue is full, lines are dropped and counted rather than waited on.
+# Every line carries the correlation ID, command and stage of the code
+# that logged it, so all lines from one command invocation can be grouped.
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import traceback
+import uuid
+from collections import Counter
+
+from loop_monitor import CURRENT_COMMAND, CURRENT_STAGE
+
+
+LOGGER_NAME = "mlbb"
+QUEUE_SIZE = 10000            # Lines buffered before new ones are dropped
+
+# Set per command invocation (or background job run)
+CORRELATION_ID = contextvars.ContextVar("correlation_id", default=None)
+
+_sample_counts = Counter()    # event -> times seen, for log_event sampling
+_listener = None
+_handler = None
+
+
+def new_correlation_id():
+    """Start a new correlation ID for the current task and return it."""
+    correlation_id = uuid.uuid4().hex[:12]
+    CORRELATION_ID.set(correlation_id)
+    return correlation_id
+
+
+def get_logger(name=None):
+    """The bot's logger, or a child of it such as ``mlbb.caching``."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+def log_event(logger, level, event, message="", sample_every=1, **fields):
+    """Log a named event with structured ``fields``.
+
+    With ``sample_every=n`` only every n-th occurrence of ``event`` is
+    written (with a ``sample_every`` field so counts can be scaled back up).
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample_every > 1:
+        seen = _sample_counts[event]
+        _sample_counts[event] = seen + 1
+        if seen % sample_every:
+            return
+        fields["sample_every"] = sample_every
+    logger.log(level, message or event,
+               extra={"event": event, "fields": fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the current command's context."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "msg": record.getMessage(),
+            "correlation_id": CORRELATION_ID.get(),
+            "command": CURRENT_COMMAND.get(),
+            "stage": CURRENT_STAGE.get(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = "".join(
+                traceback.format_exception(*record.exc_info)
+            ).rstrip()
+        return json.dumps(
+            {key: value for key, value in entry.items() if value is not None},
+            default=str, ensure_ascii=False,
+        )
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops lines instead of blocking when full.
+
+    Formatting happens here, on the caller's thread, so the context
+    variables of the code that logged are still visible.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level="INFO", stream=None):
+    """Route all logging through the JSON queue pipeline.
+
+    ``level`` applies to the bot's own loggers; third-party loggers (e.g.
+    discord.py) are kept at INFO or above. Safe to call more than once.
+    Returns the queue handler, whose ``dropped`` counts lost lines.
+    """
+    global _listener, _handler
+    level = logging.getLevelName(str(level).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+    if _handler is None:
+        log_queue = queue.Queue(QUEUE_SIZE)
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(logging.Formatter("%(message)s"))
+        _handler = DroppingQueueHandler(log_queue)
+        _handler.setFormatter(JsonFormatter())
+        _listener = logging.handlers.QueueListener(log_queue, writer)
+        _listener.start()
+        atexit.register(stop_logging)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_handler)
+    logging.getLogger().setLevel(max(level, logging.INFO))
+    get_logger().setLevel(level)
+    return _handler
+
+
+def stop_logging():
+    """Flush queued lines and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,188 @@
+# In-memory caches shared by the bot's commands.
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from bot_logging import get_logger, log_event
+
+
+log = get_logger("caching")
+
+
+class StaleWhileRevalidateCache:
+    """Async TTL cache that serves stale entries while refreshing them.
+
+    ``loader`` is an ``async`` callable taking the cache key. A fresh entry
+    is returned straight from memory. A stale entry (older than ``ttl``) is
+    still returned immediately, and a single background refresh is started
+    for that key. Only a missing key (or one older than ``max_stale``)
+    makes the caller wait on the loader; concurrent misses for the same key
+    share one load. ``on_update(key, value)`` is called whenever a load
+    stores a new value. With ``maxsize``, the least recently used entries
+    are evicted beyond that many keys.
+    """
+
+    def __init__(self, loader, ttl, max_stale=None, cacheable=None,
+                 name="cache", on_update=None, maxsize=None):
+        self._loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._cacheable = cacheable
+        self._on_update = on_update
+        self.maxsize = maxsize
+        self.name = name
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._pending = {}     # key -> asyncio.Task loading that key
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "evictions": 0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def age(self, key):
+        """Seconds since ``key`` was stored, or ``None`` if not cached."""
+        entry = self._entries.get(key)
+        return time.monotonic() - entry[0] if entry else None
+
+    def is_fresh(self, key):
+        age = self.age(key)
+        return age is not None and age <= self.ttl
+
+    def needs_load(self, key):
+        """Whether :meth:`get` would start a new load for ``key`` and wait.
+
+        Fresh and servable-stale entries are answered from memory, and a
+        load already in flight is shared, so neither costs a new load.
+        """
+        if key in self._pending:
+            return False
+        age = self.age(key)
+        return age is None or (
+            self.max_stale is not None and age > self.max_stale
+        )
+
+    def stamp(self, key, value):
+        """When ``value`` was stored under ``key``, or ``None`` if it isn't.
+
+        Identifies the cached value, e.g. for keying results derived from
+        it; the stamp changes whenever the key is reloaded or replaced.
+        """
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None and entry[1] is value else None
+
+    def peek(self, key, default=None):
+        """Return the cached value without triggering a load."""
+        entry = self._entries.get(key)
+        return entry[1] if entry else default
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when ``key`` is ``None``."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            age = time.monotonic() - entry[0]
+            if age <= self.ttl:
+                self.stats["hits"] += 1
+                return entry[1]
+            if self.max_stale is None or age <= self.max_stale:
+                self.stats["stale_hits"] += 1
+                self._start_load(key)
+                return entry[1]
+
+        self.stats["misses"] += 1
+        return await asyncio.shield(self._start_load(key))
+
+    def refresh(self, key):
+        """Schedule a background refresh of ``key`` and return its task."""
+        return self._start_load(key)
+
+    def _start_load(self, key):
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key))
+            self._pending[key] = task
+            task.add_done_callback(lambda t: self._on_load_done(key, t))
+        return task
+
+    async def _load(self, key):
+        self.stats["loads"] += 1
+        value = await self._loader(key)
+        if self._cacheable is None or self._cacheable(value):
+            self.set(key, value)
+            if self._on_update is not None:
+                self._on_update(key, value)
+        return value
+
+    def _on_load_done(self, key, task):
+        self._pending.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.stats["load_errors"] += 1
+            if key in self._entries:
+                log_event(log, logging.WARNING, "cache_refresh_failed",
+                          f"Background refresh of {self.name} {key} "
+                          f"failed, serving stale data",
+                          cache=self.name, key=key, error=str(error))
+
+
+class LRUCache:
+    """Size-bounded least-recently-used mapping with hit/miss counters."""
+
+    MISSING = object()    # Sentinel for get() when None is a valid value
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        value = self._data.get(key, self.MISSING)
+        if value is self.MISSING:
+            self.stats["misses"] += 1
+            return default
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._data.clear()
@@ -0,0 +1,184 @@
+# Inverted index from canonical heroes to their counter data.
+#
+# counter_groups (generalised_counter_reasoning.py) is organised by group
+# and mlbb_hero_counters (counter_hero_list.py) by hand-typed hero names.
+# This module resolves every name in both against the canonical hero list
+# once, so lookups become dict hits keyed by hero ID, and reports names
+# that had to be corrected or could not be matched at all.
+
+import logging
+
+from bot_logging import get_logger, log_event
+from hero_resolver import HeroResolver, normalize_name
+
+
+# Minimum WRatio for silently accepting a fuzzy correction of a data name
+AUTO_CORRECT_THRESHOLD = 90
+
+log = get_logger("counter_index")
+
+
+class CounterIndex:
+    """Counter groups and counter lists keyed by canonical hero key."""
+
+    def __init__(self, groups_by_key, counters_by_key, report):
+        self._groups = groups_by_key
+        self._counters = counters_by_key
+        self.report = report
+
+    def groups_for(self, key):
+        """All counter groups containing the hero, in definition order."""
+        return self._groups.get(key, ())
+
+    def reason_for(self, key):
+        """The reason of the first group containing the hero, if any."""
+        groups = self._groups.get(key)
+        return groups[0]["reason"] if groups else None
+
+    def counters_for(self, key):
+        """``{"weak_against": [...], "strong_against": [...]}`` of keys."""
+        return self._counters.get(key)
+
+
+def build_counter_index(id_to_name, counter_groups, hero_counters,
+                        name_matches=None, matched_against=()):
+    """Build a :class:`CounterIndex` against ``id_to_name``.
+
+    ``id_to_name`` maps canonical keys (hero IDs from the API, or names
+    when no API data is loaded) to display names. ``name_matches`` are
+    precomputed ``{data name: (hero name, kind, score)}`` matches against
+    the hero names ``matched_against`` (see static_data.py); names they
+    settle skip the fuzzy matching.
+    """
+    name_to_key = {
+        name.strip().lower(): key for key, name in id_to_name.items()
+    }
+    resolver = HeroResolver(name_to_key, id_to_name)
+    report = []
+    resolved = {}
+    # Heroes the precomputed matches never saw could match unknown names
+    matched = {name.strip().lower() for name in matched_against}
+    unseen_heroes = any(name not in matched for name in name_to_key)
+
+    def precomputed(name):
+        """The precomputed match, if it still holds for ``id_to_name``."""
+        if not name_matches or name not in name_matches:
+            return None
+        target, kind, score = name_matches[name]
+        if target is None:
+            return None if unseen_heroes else (None, kind, score)
+        key = name_to_key.get(target.strip().lower())
+        if key is None:
+            return None
+        if kind in ("exact", "case"):
+            kind = "exact" if id_to_name[key] == name else "case"
+        return key, kind, score
+
+    def match(name):
+        if name.strip().lower() in name_to_key:
+            key = name_to_key[name.strip().lower()]
+            return key, "exact" if id_to_name[key] == name else "case", 100
+        key = resolver.lookup_exact(name)
+        if key is not None:
+            # lookup_exact also knows nicknames ("Popol" -> Popol and Kupa)
+            same = normalize_name(name) == normalize_name(id_to_name[key])
+            return key, "normalized" if same else "alias", 100
+        best = resolver.suggest(name, limit=1)
+        score = best[0][1] if best else 0
+        if score >= AUTO_CORRECT_THRESHOLD:
+            return name_to_key[best[0][0].lower()], "fuzzy", score
+        return None, "unknown", score
+
+    def canonical(name, source):
+        if name not in resolved:
+            resolved[name] = precomputed(name) or match(name)
+        key, kind, score = resolved[name]
+        if kind != "exact":
+            report.append({
+                "source": source,
+                "name": name,
+                "resolved": id_to_name.get(key),
+                "kind": kind,
+                "score": score,
+            })
+        return key
+
+    groups_by_key = {}
+    for group_name, group in counter_groups.items():
+        entry = {
+            "group": group_name,
+            "reason": group.get("reason"),
+            "spells": tuple(group.get("spells", ())),
+            "tips": tuple(group.get("tips", ())),
+        }
+        for hero_name in group.get("heroes", ()):
+            key = canonical(hero_name, f"counter_groups[{group_name!r}]")
+            if key is not None:
+                groups_by_key.setdefault(key, []).append(entry)
+
+    counters_by_key = {}
+    for hero_name, lists in hero_counters.items():
+        key = canonical(hero_name, "mlbb_hero_counters keys")
+        if key is None or not isinstance(lists, dict):
+            continue
+        counters_by_key[key] = {
+            side: [
+                counter_key for counter_key in (
+                    canonical(name, f"mlbb_hero_counters[{hero_name!r}]")
+                    for name in lists.get(side, ())
+                )
+                if counter_key is not None
+            ]
+            for side in ("weak_against", "strong_against")
+        }
+
+    return CounterIndex(
+        {key: tuple(groups) for key, groups in groups_by_key.items()},
+        counters_by_key,
+        report,
+    )
+
+
+def summarize_report(report):
+    """One entry per distinct name and match, with every source it's in."""
+    summary = {}
+    for item in report:
+        key = (item["kind"], item["name"], item["resolved"], item["score"])
+        sources = summary.setdefault(key, [])
+        if item["source"] not in sources:
+            sources.append(item["source"])
+    return tuple((*key, tuple(sources)) for key, sources in summary.items())
+
+
+def log_report(report, previous=None):
+    """Log a build report as structured events, most serious first.
+
+    Each distinct name is logged once, listing its sources. Returns the
+    report's summary; when it equals ``previous`` (the summary returned
+    last time) nothing is logged, so rebuilding the index against the
+    same counter data doesn't repeat the report.
+    """
+    summary = summarize_report(report)
+    if summary == previous:
+        return summary
+    for kind, level, event, label in (
+        ("unknown", logging.ERROR, "counter_name_unmatched",
+         "Unmatched hero name"),
+        ("fuzzy", logging.WARNING, "counter_name_corrected",
+         "Auto-corrected hero name"),
+        ("normalized", logging.INFO, "counter_name_normalized",
+         "Hero name matched after punctuation normalization"),
+        ("case", logging.INFO, "counter_name_normalized",
+         "Hero name matched after case normalization"),
+        ("alias", logging.INFO, "counter_name_alias",
+         "Hero nickname resolved"),
+    ):
+        for item_kind, name, resolved, score, sources in summary:
+            if item_kind != kind:
+                continue
+            target = f" -> {resolved}" if resolved else ""
+            log_event(log, level, event,
+                      f"{label} {name!r}{target} in {', '.join(sources)}",
+                      sources=list(sources), name=name, resolved=resolved,
+                      score=score)
+    return summary
@@ -0,0 +1,56 @@
+# Precomputed counter table for !mlbb counter.
+#
+# For every hero with counter data, the table holds its weak_against
+# counters already sorted by win rate, with the display fields the command
+# renders attached. It is rebuilt off the request path whenever hero data,
+# the counter index or the win-rate data changes, so a command is a dict
+# lookup plus embed rendering.
+
+from explanations import pair_version
+
+
+class CounterTable:
+    """Sorted counter entries per hero key, tagged with a data version."""
+
+    def __init__(self, entries, version):
+        self._entries = entries
+        self.version = version
+
+    def __len__(self):
+        return len(self._entries)
+
+    def counters_for(self, key):
+        """Counter entries for ``key``, best first; empty if none."""
+        return self._entries.get(key, ())
+
+
+def build_counter_table(counter_index, id_to_name, records, winrates,
+                        version):
+    """Build a :class:`CounterTable` for every hero in ``id_to_name``.
+
+    Counters keep their list order among equal win rates (including heroes
+    missing from ``winrates``), matching a stable sort of the raw list.
+    """
+    entries = {}
+    for key, hero_name in id_to_name.items():
+        hero_counters = counter_index.counters_for(key)
+        if not hero_counters or not hero_counters.get("weak_against"):
+            continue
+        hero_record = records.get(key)
+        rows = []
+        for counter_key in hero_counters["weak_against"]:
+            name = id_to_name.get(counter_key, counter_key)
+            record = records.get(counter_key)
+            rows.append({
+                "key": counter_key,
+                "name": name,
+                "winrate": winrates.get(name.strip().lower(), 0),
+                "role": record.role if record else "Unknown",
+                "specialties": record.specialties if record else (),
+                "skill_names": record.skill_names[:2] if record else (),
+                "reason": counter_index.reason_for(counter_key),
+                "explanation_version": pair_version(hero_record, record),
+            })
+        rows.sort(key=lambda row: row["winrate"], reverse=True)
+        entries[key] = tuple(rows)
+    return CounterTable(entries, version)
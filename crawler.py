@@ -0,0 +1,173 @@
+# Adaptive bounded-concurrency crawler for per-hero API endpoints.
+#
+# The number of requests in flight follows an AIMD window: it grows by
+# roughly one slot per window of successful, fast responses and is halved
+# on errors or latency spikes. Failed requests are retried with jittered
+# exponential backoff, and a Retry-After header pauses the whole crawl.
+
+import asyncio
+import email.utils
+import random
+import time
+
+import aiohttp
+
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP date) to seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def is_retryable(error):
+    if isinstance(error, aiohttp.ContentTypeError):
+        # Usually an HTML error page from the hosting platform
+        return True
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+class AdaptiveCrawler:
+    """Fetch many keys with an AIMD concurrency window and retries.
+
+    ``fetch`` is an ``async`` callable taking one key and returning its
+    result. :meth:`crawl` returns ``(results, report)`` where ``results``
+    maps every key to its result, or ``None`` if it ultimately failed.
+    """
+
+    def __init__(self, fetch, initial_window=8, min_window=1, max_window=32,
+                 max_retries=4, base_backoff=0.5, max_backoff=30.0,
+                 slow_threshold=3.0):
+        self._fetch = fetch
+        self.window = float(initial_window)
+        self.min_window = min_window
+        self.max_window = max_window
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.slow_threshold = slow_threshold
+        self._in_flight = 0
+        self._pause_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = None
+
+    # --- AIMD window ---
+
+    def _on_success(self, latency):
+        if latency > self.slow_threshold:
+            self._decrease()
+        else:
+            self.window = min(self.max_window, self.window + 1 / self.window)
+
+    def _decrease(self):
+        # Halve at most once per slow-threshold period, like TCP does once
+        # per round trip, so one burst of failures doesn't collapse to 1.
+        now = time.monotonic()
+        if now - self._last_decrease < self.slow_threshold:
+            return
+        self._last_decrease = now
+        self.window = max(self.min_window, self.window / 2)
+
+    async def _acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: self._in_flight < int(self.window)
+            )
+            self._in_flight += 1
+
+    async def _release(self):
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _backoff(self, attempt):
+        ceiling = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+        return random.uniform(0, ceiling)  # "Full jitter"
+
+    # --- Crawl ---
+
+    async def _fetch_one(self, key, report):
+        for attempt in range(self.max_retries + 1):
+            pause = self._pause_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            await self._acquire()
+            started = time.perf_counter()
+            try:
+                result = await self._fetch(key)
+            except Exception as e:
+                error = e
+            else:
+                latency = time.perf_counter() - started
+                report["latencies"][key] = latency
+                self._on_success(latency)
+                return result
+            finally:
+                await self._release()
+
+            if not is_retryable(error) or attempt == self.max_retries:
+                report["failures"][key] = f"{type(error).__name__}: {error}"
+                if is_retryable(error):
+                    self._decrease()
+                return None
+
+            report["retries"] += 1
+            self._decrease()
+            delay = self._backoff(attempt)
+            headers = getattr(error, "headers", None) or {}
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            if retry_after is not None:
+                report["throttled"] += 1
+                delay = max(delay, min(retry_after, self.max_backoff))
+                self._pause_until = max(
+                    self._pause_until, time.monotonic() + delay
+                )
+            await asyncio.sleep(delay)
+        return None
+
+    async def crawl(self, keys):
+        self._cond = asyncio.Condition()
+        report = {
+            "latencies": {},   # key -> seconds for the successful attempt
+            "failures": {},    # key -> last error
+            "retries": 0,
+            "throttled": 0,
+        }
+        started = time.perf_counter()
+        keys = list(keys)
+        values = await asyncio.gather(
+            *(self._fetch_one(key, report) for key in keys)
+        )
+        latencies = sorted(report["latencies"].values())
+        report.update({
+            "duration": time.perf_counter() - started,
+            "requested": len(keys),
+            "fetched": len(latencies),
+            "failed": len(report["failures"]),
+            "latency_p50": percentile(latencies, 0.50),
+            "latency_p95": percentile(latencies, 0.95),
+            "latency_max": latencies[-1] if latencies else 0.0,
+            "final_window": self.window,
+        })
+        return dict(zip(keys, values)), report
@@ -0,0 +1,231 @@
+# Cached OpenAI explanations of why one hero counters another.
+#
+# Explanations are stored on disk per (hero, counter) pair together with a
+# version derived from both heroes' records, so a pair is regenerated only
+# when one of the two heroes actually changes. Commands fetch all misses
+# concurrently under a hard latency budget; generations that finish after
+# the budget still land in the cache for the next request.
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+from bot_logging import get_logger, log_event
+
+
+PROMPT_TEMPLATE = (
+    "In Mobile Legends, explain in 2-3 sentences why {counter} is a "
+    "strong counter to {hero}. Focus on gameplay mechanics, skills, "
+    "and matchups. Avoid generic statements."
+)
+MODEL = "gpt-3.5-turbo"
+REQUEST_TIMEOUT = 20     # Seconds before a single generation is abandoned
+SAVE_DELAY = 5           # Seconds to batch new entries before writing
+
+log = get_logger("explanations")
+
+
+def pair_version(hero_record, counter_record):
+    """Fingerprint of the data an explanation for this pair depends on."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{MODEL}|{PROMPT_TEMPLATE}".encode())
+    for record in (hero_record, counter_record):
+        data = record.to_dict() if record is not None else None
+        if data is not None:
+            # The background story doesn't affect the matchup
+            data.pop("background_sentences", None)
+        digest.update(json.dumps(data, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def openai_configured():
+    # Doesn't import openai (slow) just to check; a key set on the module
+    # only counts once something else has imported it
+    openai = sys.modules.get("openai")
+    return bool(
+        os.getenv("OPENAI_API_KEY") or (openai is not None and openai.api_key)
+    )
+
+
+async def generate_explanation(hero, counter):
+    """Ask OpenAI why ``counter`` beats ``hero``. Raises on failure."""
+    import openai         # Imported on first use; it is slow to import
+
+    response = await openai.ChatCompletion.acreate(
+        model=MODEL,
+        messages=[{
+            "role": "user",
+            "content": PROMPT_TEMPLATE.format(hero=hero, counter=counter),
+        }],
+        max_tokens=100,
+        temperature=0.7,
+        request_timeout=REQUEST_TIMEOUT,
+    )
+    return response.choices[0].message.content.strip()
+
+
+class ExplanationCache:
+    """Persistent ``(hero, counter, version) -> explanation`` store."""
+
+    def __init__(self, path, generate=generate_explanation):
+        self.path = path
+        self._generate = generate
+        self._entries = {}    # "hero|counter" -> {"version", "text", ...}
+        self._pending = {}    # "hero|counter|version" -> asyncio.Task
+        self._save_task = None
+        self._dirty = False
+        self.stats = {"hits": 0, "misses": 0, "generated": 0, "errors": 0,
+                      "budget_exceeded": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- Persistence ---
+
+    def load(self):
+        """Load entries from disk; a missing or bad file means empty."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            log_event(log, logging.WARNING, "explanation_cache_unreadable",
+                      "Ignoring unreadable explanation cache",
+                      path=self.path, error=str(e))
+            return 0
+        if isinstance(entries, dict):
+            self._entries = entries
+        return len(self._entries)
+
+    def save(self):
+        """Atomically write all entries. Blocking; use a thread."""
+        self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    async def flush(self):
+        """Write pending entries now instead of after the save delay."""
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        if self._dirty:
+            try:
+                await asyncio.to_thread(self.save)
+            except OSError as e:
+                self._save_failed(e)
+
+    def _schedule_save(self):
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.ensure_future(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(SAVE_DELAY)
+        try:
+            await asyncio.to_thread(self.save)
+        except OSError as e:
+            self._save_failed(e)
+
+    def _save_failed(self, error):
+        log_event(log, logging.WARNING, "explanation_cache_save_failed",
+                  "Failed to save explanation cache",
+                  path=self.path, error=str(error))
+
+    # --- Lookups ---
+
+    def get(self, hero, counter, version):
+        entry = self._entries.get(f"{hero}|{counter}")
+        if entry and entry.get("version") == version:
+            return entry["text"]
+        return None
+
+    def set(self, hero, counter, version, text):
+        self._entries[f"{hero}|{counter}"] = {
+            "version": version,
+            "text": text,
+            "created_at": time.time(),
+        }
+        self._dirty = True
+        self._schedule_save()
+
+    def _start_generation(self, hero, counter, version):
+        key = f"{hero}|{counter}|{version}"
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._generate_and_store(hero, counter, version)
+            )
+            self._pending[key] = task
+            task.add_done_callback(lambda t: self._pending.pop(key, None))
+        return task
+
+    async def _generate_and_store(self, hero, counter, version):
+        try:
+            text = await self._generate(hero, counter)
+        except Exception as e:
+            self.stats["errors"] += 1
+            log_event(log, logging.WARNING, "explanation_failed",
+                      f"OpenAI explanation for {counter} vs {hero} failed",
+                      hero=hero, counter=counter, error=str(e))
+            return None
+        if text:
+            self.stats["generated"] += 1
+            self.set(hero, counter, version, text)
+        return text
+
+    async def explain(self, hero, counters, budget):
+        """Return ``{counter: explanation}`` for what is ready in time.
+
+        ``counters`` is a list of ``(counter_name, version)``. Cache misses
+        are generated concurrently; anything not done within ``budget``
+        seconds is left out (and keeps generating in the background).
+        """
+        results = {}
+        tasks = {}
+        for counter, version in counters:
+            text = self.get(hero, counter, version)
+            if text is not None:
+                self.stats["hits"] += 1
+                results[counter] = text
+            else:
+                self.stats["misses"] += 1
+                if openai_configured():
+                    tasks[counter] = self._start_generation(
+                        hero, counter, version
+                    )
+
+        if tasks:
+            done, pending = await asyncio.wait(
+                tasks.values(), timeout=budget
+            )
+            self.stats["budget_exceeded"] += len(pending)
+            for counter, task in tasks.items():
+                if task in done and task.result():
+                    results[counter] = task.result()
+        return results
+
+    async def prewarm(self, pairs, concurrency=4):
+        """Generate every missing ``(hero, counter, version)`` in ``pairs``.
+
+        Returns the number of explanations generated.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        before = self.stats["generated"]
+
+        async def one(hero, counter, version):
+            async with semaphore:
+                await self._start_generation(hero, counter, version)
+
+        await asyncio.gather(*(
+            one(hero, counter, version)
+            for hero, counter, version in pairs
+            if self.get(hero, counter, version) is None
+        ))
+        await self.flush()
+        return self.stats["generated"] - before
@@ -0,0 +1,320 @@
+# Local stand-in for the MLBB stats API, for benchmarks and load tests.
+#
+# Serves recorded responses for hero-list, hero-detail, hero-rank and
+# hero-detail-stats from a fixtures file, with configurable latency and
+# error injection. Without recorded fixtures it falls back to deterministic
+# synthetic ones built from hero_list.py, so everything runs offline.
+#
+#   python fake_mlbb_api.py record            # capture the live API
+#   python fake_mlbb_api.py serve --latency 0.05 --error-rate 0.01
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import random
+import time
+
+from aiohttp import web
+
+from hero_list import hero_dict
+from upstream import UpstreamClient
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES_PATH = os.path.join(BASE_DIR, "mlbb_fixtures.json.gz")
+LIVE_API_URL = "https://api-mobilelegends.vercel.app/api/"
+
+# Every hero-rank window the bot ingests
+RANKS = ("all", "epic", "legend", "mythic", "honor", "glory")
+DAYS = (7, 30)
+
+# Query parameters that don't change the response (page size)
+IGNORED_PARAMS = ("size",)
+
+
+def fixture_key(path, params=None):
+    """Key of a response: the API path plus its meaningful query params."""
+    path = path.lstrip("/")
+    query = "&".join(
+        f"{key}={value}" for key, value in sorted((params or {}).items())
+        if key not in IGNORED_PARAMS
+    )
+    return f"{path}?{query}" if query else path
+
+
+# =========================
+# Fixtures
+# =========================
+
+def load_fixtures(path=DEFAULT_FIXTURES_PATH):
+    """Recorded fixtures as ``{"source", "responses"}``, or ``None``."""
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fixtures(fixtures, path=DEFAULT_FIXTURES_PATH):
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(fixtures, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def synthetic_fixtures(seed=0):
+    """Deterministic fixtures shaped like the real API's responses."""
+    rng = random.Random(seed)
+    names = sorted(hero_dict)
+    heroes = {str(i): name for i, name in enumerate(names, 1)}
+    roles = ["Tank", "Fighter", "Assassin", "Mage", "Marksman", "Support"]
+    lanes = ["Gold Lane", "EXP Lane", "Mid Lane", "Jungle", "Roam"]
+    specialties = ["Burst", "Charge", "Crowd Control", "Regen", "Poke",
+                   "Reap", "Chase", "Push", "Damage", "Initiator"]
+    responses = {"hero-list/": heroes}
+
+    for hero_id, name in heroes.items():
+        story = " ".join(
+            f"{name} {rng.choice(['fought', 'trained', 'wandered'])} "
+            f"across the Land of Dawn for {rng.randint(2, 40)} years."
+            for _ in range(rng.randint(3, 8))
+        )
+        responses[fixture_key(f"hero-detail/{hero_id}/")] = {
+            "code": 0, "data": {"records": [{"data": {
+                "heroid": int(hero_id),
+                "background": f"<font color='#fff'>{name}</font> {story}",
+                "hero": {"data": {
+                    "heroid": int(hero_id),
+                    "name": name,
+                    "sortlabel": rng.sample(roles, 2),
+                    "roadsortlabel": [rng.choice(lanes), ""],
+                    "speciality": rng.sample(specialties, 2),
+                    "heroskilllist": [{"skilllist": [
+                        {"skillname": f"{name} Skill {n}"}
+                        for n in range(1, 5)
+                    ]}],
+                }},
+            }}]},
+        }
+        partners = rng.sample(sorted(heroes), 8)
+        responses[fixture_key(f"hero-detail-stats/{hero_id}/")] = {
+            "code": 0, "data": {"records": [{"data": {
+                "main_heroid": int(hero_id),
+                "main_hero_win_rate": rng.uniform(0.4, 0.6),
+                "main_hero_appearance_rate": rng.uniform(0.001, 0.05),
+                "main_hero_ban_rate": rng.uniform(0, 0.3),
+                "sub_hero": [_synthetic_partner(rng, p, 1)
+                             for p in partners[:5]],
+                "sub_hero_last": [_synthetic_partner(rng, p, -1)
+                                  for p in partners[5:]],
+            }}]},
+        }
+
+    for rank in RANKS:
+        for days in DAYS:
+            responses[fixture_key(
+                "hero-rank/", {"rank": rank, "days": days}
+            )] = {"code": 0, "data": {"records": [{"data": {
+                "main_heroid": int(hero_id),
+                "main_hero": {"data": {"name": name}},
+                "main_hero_win_rate": rng.uniform(0.4, 0.6),
+                "main_hero_appearance_rate": rng.uniform(0.001, 0.05),
+                "main_hero_ban_rate": rng.uniform(0, 0.3),
+            }} for hero_id, name in heroes.items()]}}
+    return {"source": f"synthetic:{seed}", "responses": responses}
+
+
+def _synthetic_partner(rng, hero_id, sign):
+    partner = {
+        "heroid": int(hero_id),
+        "hero_win_rate": rng.uniform(0.4, 0.6),
+        "hero_appearance_rate": rng.uniform(0.001, 0.05),
+        "increase_win_rate": sign * rng.uniform(0.001, 0.05),
+    }
+    for segment in ("6_8", "8_10", "10_12", "12_14", "14_16", "16_18",
+                    "18_20"):
+        partner[f"min_win_rate{segment}"] = rng.uniform(0.35, 0.65)
+    partner["min_win_rate20"] = rng.uniform(0.35, 0.65)
+    return partner
+
+
+async def record_fixtures(base_url=LIVE_API_URL, concurrency=8):
+    """Capture every endpoint the bot uses from a live API."""
+    client = UpstreamClient(base_url)
+    await client.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    responses = {}
+
+    async def fetch(path, params=None):
+        async with semaphore:
+            responses[fixture_key(path, params)] = await client.get_json(
+                path, params=params
+            )
+
+    try:
+        await fetch("hero-list/")
+        hero_ids = list(responses["hero-list/"])
+        jobs = [fetch(f"hero-detail/{hero_id}/") for hero_id in hero_ids]
+        jobs += [fetch(f"hero-detail-stats/{hero_id}/")
+                 for hero_id in hero_ids]
+        jobs += [
+            fetch("hero-rank/", {"rank": rank, "days": days,
+                                 "size": len(hero_ids)})
+            for rank in RANKS for days in DAYS
+        ]
+        await asyncio.gather(*jobs)
+    finally:
+        await client.close()
+    return {
+        "source": f"recorded:{base_url}@{int(time.time())}",
+        "responses": responses,
+    }
+
+
+# =========================
+# Server
+# =========================
+
+class FakeMLBBApi:
+    """aiohttp server answering API paths from fixtures.
+
+    Every response waits ``latency`` seconds plus up to ``jitter`` more.
+    A fraction ``error_rate`` of requests fail with ``error_status``.
+    With ``etags``, responses carry an ETag and honour If-None-Match, so
+    the bot's conditional refreshes get 304s like a caching CDN would.
+    """
+
+    def __init__(self, fixtures, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=503, etags=True, seed=0):
+        self.source = fixtures["source"]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.etags = etags
+        self._rng = random.Random(seed)
+        self._runner = None
+        # Encode once up front so serving doesn't skew measurements
+        self._bodies = {}
+        for key, payload in fixtures["responses"].items():
+            body = json.dumps(payload).encode("utf-8")
+            etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+            self._bodies[key] = (body, etag)
+        self.stats = {"requests": 0, "not_modified": 0, "not_found": 0,
+                      "injected_errors": 0}
+
+    @property
+    def hero_names(self):
+        return sorted(json.loads(self._bodies["hero-list/"][0]).values())
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start serving and return the API base URL."""
+        app = web.Application()
+        app.router.add_get("/api/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}/api/"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        self.stats["requests"] += 1
+        delay = self.latency + self._rng.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self._rng.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            return web.json_response(
+                {"code": self.error_status, "message": "Injected error"},
+                status=self.error_status, headers={"Retry-After": "1"},
+            )
+        key = fixture_key(request.match_info["path"], request.query)
+        if key not in self._bodies:
+            self.stats["not_found"] += 1
+            return web.json_response({"message": "Not found"}, status=404)
+        body, etag = self._bodies[key]
+        if not self.etags:
+            return web.Response(body=body, content_type="application/json")
+        if request.headers.get("If-None-Match") == etag:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, content_type="application/json",
+                            headers={"ETag": etag})
+
+
+def fixtures_or_synthetic(path=DEFAULT_FIXTURES_PATH, seed=0):
+    """Recorded fixtures if present, else synthetic ones."""
+    return load_fixtures(path) or synthetic_fixtures(seed)
+
+
+def add_server_arguments(parser):
+    """Fake-API options shared by the benchmark and load-test scripts."""
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_PATH,
+                        help="recorded fixtures (synthetic if missing)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every API response")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of API requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--no-etags", dest="etags", action="store_false",
+                        help="don't send ETags (no 304 revalidation)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def server_from_args(args):
+    return FakeMLBBApi(
+        fixtures_or_synthetic(args.fixtures, args.seed),
+        latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status,
+        etags=args.etags, seed=args.seed,
+    )
+
+
+async def serve(args):
+    api = server_from_args(args)
+    base_url = await api.start(args.host, args.port)
+    print(f"Serving {api.source} fixtures at {base_url} (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the MLBB stats API."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="capture the live API")
+    record.add_argument("--url", default=LIVE_API_URL)
+    record.add_argument("--out", default=DEFAULT_FIXTURES_PATH)
+    serve_parser = commands.add_parser("serve", help="run the fake API")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(serve_parser)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        fixtures = asyncio.run(record_fixtures(args.url))
+        save_fixtures(fixtures, args.out)
+        print(f"Recorded {len(fixtures['responses'])} responses to "
+              f"{args.out}")
+    else:
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -68,7 +68,7 @@ counter_groups = {
     },
     "anti-dash": {
         "heroes": [
-            "Khufra", "Minsitthar", "Ruby", "Atlas", "Minatour"
+            "Khufra", "Minsitthar", "Ruby", "Atlas", "Minotaur"
         ],
         "reason": (
             "These heroes can interrupt, block, or punish dash/blink "
@@ -364,7 +364,7 @@ counter_groups = {
     "anti-objective": {
         "heroes": [
             "Baxia", "Grock", "Khufra", "Atlas", "Tigreal",
-            "Franco", "Minatour"
+            "Franco", "Minotaur"
         ],
         "reason": (
             "These heroes excel at contesting or defending objectives like "
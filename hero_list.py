@@ -28,7 +28,7 @@ hero_dict = {
     "Sun": None,
     "Alpha": None,
     "Ruby": None,
-    "Yu Sun-shin": None,
+    "Yi Sun-shin": None,
     "Moskov": None,
     "Johnson": None,
     "Cyclops": None,
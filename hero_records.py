@@ -0,0 +1,118 @@
+# Compact, normalized projection of the hero-detail API payload.
+#
+# A HeroRecord is built once when a hero's detail JSON is ingested, so
+# commands read plain attributes instead of walking
+# data.records[0].data.hero.data on every call.
+
+import re
+
+
+FONT_TAG_PATTERN = re.compile(r'<font[^>]*>')
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+
+def clean_html_tags(text):
+    """Remove <font ...> and </font> tags from a string.
+    Handles non-string input."""
+    if not isinstance(text, str):
+        return ""
+    return FONT_TAG_PATTERN.sub('', text).replace('</font>', '')
+
+
+def _labels(values):
+    """Normalize an API label list, dropping blank placeholder entries."""
+    if not isinstance(values, list):
+        return ()
+    return tuple(
+        value.strip() for value in values
+        if isinstance(value, str) and value.strip()
+    )
+
+
+class HeroRecord:
+    """Fields the bot's commands use for one hero.
+
+    Label fields are tuples of non-blank strings. The background story is
+    kept only as its sentences; ``background`` joins them on demand.
+    """
+
+    hero_id: str
+    name: str
+    roles: tuple[str, ...]
+    lanes: tuple[str, ...]
+    specialties: tuple[str, ...]
+    skill_names: tuple[str, ...]
+    background_sentences: tuple[str, ...]
+
+    __slots__ = (
+        "hero_id",
+        "name",
+        "roles",
+        "lanes",
+        "specialties",
+        "skill_names",
+        "background_sentences",
+    )
+
+    def __init__(self, hero_id, name, roles=(), lanes=(), specialties=(),
+                 skill_names=(), background_sentences=()):
+        self.hero_id = hero_id
+        self.name = name
+        self.roles = tuple(roles)
+        self.lanes = tuple(lanes)
+        self.specialties = tuple(specialties)
+        self.skill_names = tuple(skill_names)
+        self.background_sentences = tuple(background_sentences)
+
+    def __repr__(self):
+        return f"HeroRecord({self.hero_id!r}, {self.name!r})"
+
+    @property
+    def background(self):
+        return " ".join(self.background_sentences)
+
+    @property
+    def role(self):
+        return self.roles[0] if self.roles else "Unknown"
+
+    @property
+    def lane(self):
+        return self.lanes[0] if self.lanes else "Unknown"
+
+    @classmethod
+    def from_detail(cls, hero_id, name, detail):
+        """Build a record from a raw ``hero-detail/{id}/`` response."""
+        hero_info = (
+            detail.get("data", {})
+            .get("records", [{}])[0]
+            .get("data", {})
+        )
+        hero = hero_info.get("hero", {}).get("data", {})
+
+        skill_names = []
+        for group in hero.get("heroskilllist") or []:
+            for skill in group.get("skilllist") or []:
+                skill_names.append(skill.get("skillname", "Skill"))
+
+        background = clean_html_tags(hero_info.get("background", ""))
+        sentences = [
+            s.strip() for s in SENTENCE_SPLIT_PATTERN.split(background)
+            if s.strip()
+        ]
+        return cls(
+            hero_id=str(hero_id),
+            name=name,
+            roles=_labels(hero.get("sortlabel")),
+            lanes=_labels(hero.get("roadsortlabel")),
+            specialties=_labels(hero.get("speciality")),
+            skill_names=skill_names,
+            background_sentences=sentences,
+        )
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.__slots__
+                      if field in data})
@@ -0,0 +1,145 @@
+# Fuzzy hero-name resolution shared by every command that takes a hero.
+#
+# A resolver is built once per hero data snapshot. Lookups go through
+# exact names, a nickname table and then a character-trigram index that
+# narrows the field to a handful of candidates before fuzzy scoring, so a
+# typo never triggers a WRatio scan over every hero on the event loop.
+
+import re
+from collections import Counter
+
+from caching import LRUCache
+
+
+# Community nicknames -> canonical hero names (as used by the hero list)
+HERO_ALIASES = {
+    "yss": "Yi Sun-shin",
+    "yi sun shin": "Yi Sun-shin",
+    "xborg": "X.Borg",
+    "x borg": "X.Borg",
+    "lapu": "Lapu-Lapu",
+    "lapulapu": "Lapu-Lapu",
+    "popol": "Popol and Kupa",
+    "kupa": "Popol and Kupa",
+    "chang e": "Chang'e",
+    "yz": "Yu Zhong",
+    "luo": "Luo Yi",
+    "gatot": "Gatotkaca",
+    "ben": "Benedetta",
+    "esme": "Esmeralda",
+    "guin": "Guinevere",
+    "khal": "Khaleed",
+    "mino": "Minotaur",
+    "wan": "Wanwan",
+    "haya": "Hayabusa",
+    "lance": "Lancelot",
+    "valen": "Valentina",
+    "fredrin": "Fredrinn",
+}
+
+MATCH_THRESHOLD = 80     # Minimum WRatio to accept a fuzzy match
+SUGGEST_THRESHOLD = 70   # Minimum WRatio to offer a "did you mean"
+NGRAM_SIZE = 3
+MAX_CANDIDATES = 8       # Heroes scored per query after n-gram filtering
+
+_NON_ALNUM_PATTERN = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name):
+    """Lowercase and drop punctuation/spacing: "X.Borg" -> "xborg"."""
+    name = name.strip().lower().replace("’", "'")
+    return _NON_ALNUM_PATTERN.sub("", name)
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    padded = f"  {text} "
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+class HeroResolver:
+    """Resolve user-typed hero names to hero IDs, with suggestions."""
+
+    def __init__(self, name_to_id, id_to_name, aliases=None,
+                 cache_size=1024):
+        self._id_to_name = id_to_name
+        self._exact = {}                   # lowercase / normalized -> id
+        for lower_name, hero_id in name_to_id.items():
+            self._exact[lower_name] = hero_id
+            self._exact.setdefault(normalize_name(lower_name), hero_id)
+
+        for alias, target in (aliases or HERO_ALIASES).items():
+            hero_id = self._exact.get(normalize_name(target))
+            if hero_id is not None:
+                self._exact.setdefault(alias, hero_id)
+                self._exact.setdefault(normalize_name(alias), hero_id)
+
+        self._index = {}                   # n-gram -> [hero_id, ...]
+        for hero_id, name in id_to_name.items():
+            for gram in ngrams(normalize_name(name)):
+                self._index.setdefault(gram, []).append(hero_id)
+
+        self._cache = LRUCache(cache_size)
+
+    @property
+    def cache_stats(self):
+        return self._cache.stats
+
+    def _candidates(self, normalized):
+        overlap = Counter()
+        for gram in ngrams(normalized):
+            overlap.update(self._index.get(gram, ()))
+        return [hero_id for hero_id, _ in overlap.most_common(MAX_CANDIDATES)]
+
+    def _ranked(self, query):
+        """Score n-gram candidates for ``query``, best first."""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        # Imported on first use: most lookups are exact, and thefuzz adds
+        # noticeably to startup time
+        from thefuzz import fuzz
+
+        lowered = query.strip().lower()
+        scored = [
+            (fuzz.WRatio(lowered, self._id_to_name[hero_id].lower()), hero_id)
+            for hero_id in self._candidates(normalized)
+        ]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored
+
+    def lookup_exact(self, query):
+        """Hero ID for an exact, punctuation-insensitive or alias match."""
+        key = query.strip().lower()
+        return self._exact.get(key) or self._exact.get(normalize_name(key))
+
+    def resolve(self, query):
+        """Return ``(hero_id, score)`` for ``query``, or ``None``.
+
+        Exact names and aliases score 100. Results, including misses, are
+        memoized per resolver.
+        """
+        key = query.strip().lower()
+        cached = self._cache.get(key, LRUCache.MISSING)
+        if cached is not LRUCache.MISSING:
+            return cached
+
+        hero_id = self.lookup_exact(key)
+        if hero_id is not None:
+            result = (hero_id, 100)
+        else:
+            ranked = self._ranked(query)
+            result = None
+            if ranked and ranked[0][0] >= MATCH_THRESHOLD:
+                result = (ranked[0][1], ranked[0][0])
+        self._cache.set(key, result)
+        return result
+
+    def suggest(self, query, limit=3, min_score=0):
+        """Return up to ``limit`` ``(hero_name, score)`` "did you mean"s
+        scoring at least ``min_score``.
+        """
+        return [
+            (self._id_to_name[hero_id], score)
+            for score, hero_id in self._ranked(query)[:limit]
+            if score >= min_score
+        ]
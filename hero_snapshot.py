@@ -0,0 +1,96 @@
+# Compressed on-disk snapshot of the hero caches for warm starts.
+#
+# The snapshot is a gzip-compressed JSON document tagged with a schema
+# version. Files written by an incompatible version are ignored rather
+# than loaded, and writes go through a temporary file so a crash mid-save
+# never leaves a truncated snapshot behind.
+
+import gzip
+import json
+import logging
+import os
+import time
+
+from bot_logging import get_logger, log_event
+from hero_records import HeroRecord
+
+
+SNAPSHOT_SCHEMA_VERSION = 3
+
+log = get_logger("hero_snapshot")
+
+
+def _ignore(path, reason, **fields):
+    log_event(log, logging.WARNING, "hero_snapshot_ignored",
+              f"Ignoring hero snapshot {path}: {reason}",
+              path=path, reason=reason, **fields)
+
+
+def save_snapshot(path, records, hero_details, name_to_id, id_to_name,
+                  validators):
+    """Atomically write the hero caches to ``path``.
+
+    ``records`` maps hero IDs to :class:`HeroRecord`; ``hero_details`` holds
+    raw detail JSON and is usually empty. Blocking: call it through
+    ``asyncio.to_thread`` from the event loop. Returns the size of the
+    written file in bytes.
+    """
+    payload = {
+        "schema": SNAPSHOT_SCHEMA_VERSION,
+        "saved_at": time.time(),
+        "records": {
+            hero_id: record.to_dict() for hero_id, record in records.items()
+        },
+        "hero_details": hero_details,
+        "name_to_id": name_to_id,
+        "id_to_name": id_to_name,
+        "validators": validators,
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(payload, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def load_snapshot(path):
+    """Read a snapshot written by :func:`save_snapshot`.
+
+    Returns the decoded payload with ``records`` rebuilt as
+    :class:`HeroRecord` objects, or ``None`` when the file is missing,
+    unreadable, malformed or was written with a different schema version.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, EOFError, ValueError) as e:
+        _ignore(path, "unreadable", error=str(e))
+        return None
+
+    if not isinstance(payload, dict):
+        _ignore(path, "not an object", type=type(payload).__name__)
+        return None
+    if payload.get("schema") != SNAPSHOT_SCHEMA_VERSION:
+        _ignore(path, "schema mismatch", schema=payload.get("schema"),
+                expected=SNAPSHOT_SCHEMA_VERSION)
+        return None
+    if not all(
+        isinstance(payload.get(key), dict)
+        for key in ("records", "hero_details", "name_to_id", "id_to_name",
+                    "validators")
+    ) or not isinstance(payload.get("saved_at"), (int, float)):
+        _ignore(path, "incomplete")
+        return None
+    try:
+        payload["records"] = {
+            hero_id: HeroRecord.from_dict(data)
+            for hero_id, data in payload["records"].items()
+        }
+    except (KeyError, TypeError, AttributeError) as e:
+        _ignore(path, "bad records", error=str(e))
+        return None
+    return payload
@@ -0,0 +1,144 @@
+# Columnar hero statistics from the hero-rank API.
+#
+# One HeroStatsTable holds a single (rank, days) window as parallel NumPy
+# arrays, so sorting, filtering and top-N selection by any metric are
+# vectorized and answered from memory. NumPy is slow to import and only
+# needed once rankings arrive, so it is imported on first use (see _np()).
+
+
+# Metric name -> (hero-rank field, display label). Aliases map onto these.
+METRICS = {
+    "win": ("main_hero_win_rate", "Win Rate"),
+    "pick": ("main_hero_appearance_rate", "Pick Rate"),
+    "ban": ("main_hero_ban_rate", "Ban Rate"),
+}
+METRIC_ALIASES = {
+    "wr": "win", "winrate": "win",
+    "pr": "pick", "appearance": "pick",
+    "br": "ban",
+}
+
+
+class HeroRankError(Exception):
+    """The hero-rank API answered, but without usable ranking data."""
+
+
+def metric_name(name):
+    """Canonical metric for ``name`` ("wr" -> "win"), or ``None``."""
+    name = name.strip().lower()
+    name = METRIC_ALIASES.get(name, name)
+    return name if name in METRICS else None
+
+
+def _np():
+    """The numpy module, imported on first call."""
+    import numpy
+
+    return numpy
+
+
+def _rate(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class HeroStatsTable:
+    """Per-hero win/pick/ban rates for one rank and day window."""
+
+    def __init__(self, names, columns):
+        np = _np()
+        self.names = np.asarray(names, dtype=object)
+        self.columns = {
+            metric: np.asarray(columns[metric], dtype=np.float64)
+            for metric in METRICS
+        }
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_rank_json(cls, data):
+        """Build a table from a ``hero-rank/`` response.
+
+        Raises :class:`HeroRankError` if the API reported an error.
+        """
+        records = data.get("data", {}).get("records")
+        if data.get("code") != 0 or records is None:
+            raise HeroRankError(data.get("message", "No message from API."))
+
+        names = []
+        columns = {metric: [] for metric in METRICS}
+        for record in records:
+            hero_data = record.get("data")
+            if not hero_data:
+                continue
+            names.append(
+                hero_data.get("main_hero", {})
+                .get("data", {})
+                .get("name", "Unknown")
+            )
+            for metric, (field, _) in METRICS.items():
+                columns[metric].append(_rate(hero_data.get(field)))
+        return cls(names, columns)
+
+    def mask(self, metric, minimum=None, maximum=None):
+        """Boolean mask of heroes whose ``metric`` is within the bounds."""
+        np = _np()
+        values = self.columns[metric]
+        keep = np.ones(len(values), dtype=bool)
+        if minimum is not None:
+            keep &= values >= minimum
+        if maximum is not None:
+            keep &= values <= maximum
+        return keep
+
+    def sort(self, metric, ascending=False, mask=None):
+        """Row indices ordered by ``metric``; ties keep upstream order."""
+        np = _np()
+        candidates = (
+            np.flatnonzero(mask) if mask is not None
+            else np.arange(len(self.names))
+        )
+        values = self.columns[metric][candidates]
+        order = np.argsort(values if ascending else -values, kind="stable")
+        return candidates[order]
+
+    def top(self, metric, n=10, ascending=False, mask=None):
+        """Indices of the ``n`` best (or worst) rows by ``metric``, sorted.
+
+        Selects with ``argpartition`` so only the ``n`` winners are sorted.
+        """
+        np = _np()
+        candidates = (
+            np.flatnonzero(mask) if mask is not None
+            else np.arange(len(self.names))
+        )
+        if n <= 0:
+            return candidates[:0]
+        if n >= len(candidates):
+            return self.sort(metric, ascending, mask)
+        values = self.columns[metric][candidates]
+        keys = values if ascending else -values
+        selected = np.sort(np.argpartition(keys, n - 1)[:n])
+        selected = selected[np.argsort(keys[selected], kind="stable")]
+        return candidates[selected]
+
+    def rows(self, indices):
+        """``[{"name", "win", "pick", "ban"}, ...]`` for ``indices``."""
+        return [
+            {
+                "name": self.names[i],
+                **{metric: float(self.columns[metric][i])
+                   for metric in METRICS},
+            }
+            for i in indices
+        ]
+
+    def winrates_by_name(self):
+        """``hero name (lowercase) -> win rate`` for every row."""
+        return {
+            name.strip().lower(): float(rate)
+            for name, rate in zip(self.names, self.columns["win"])
+        }
@@ -0,0 +1,300 @@
+# Gateway-free load test of the !mlbb command handlers.
+#
+# Offers counter/ranks/synergy/trivia invocations at a fixed rate from a
+# pool of synthetic users, through the bot's real command pipeline (see
+# synthetic_discord.py), against the local fake API (see fake_mlbb_api.py).
+# Reports latency, throughput and event-loop lag per offered rate, so
+# stepping the rate up shows where one process saturates:
+#
+#   python loadtest.py --rate 25 50 100 200 --duration 20 --users 500
+#   python loadtest.py --rate 100 --output after.json --compare before.json
+#
+# Arrivals are open-loop: a slow handler doesn't delay the next request,
+# and latency is measured from when a request was due, not when it
+# managed to start.
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from discord.ext import commands
+
+from benchmark import (
+    COMMANDS, CommandDriver, compare, git_revision, import_bot, summarize,
+)
+from bot_logging import configure_logging
+from fake_mlbb_api import add_server_arguments, server_from_args
+from loop_monitor import LoopLagMonitor
+import synthetic_discord
+
+
+SCHEMA_VERSION = 1
+DEFAULT_MIX = "counter=4,ranks=3,synergy=2,trivia=1"
+
+
+def parse_mix(text):
+    """``"counter=4,ranks=1"`` -> ``{"counter": 4.0, "ranks": 1.0}``."""
+    mix = {}
+    for part in text.split(","):
+        command, _, weight = part.partition("=")
+        command = command.strip()
+        if command not in COMMANDS:
+            raise argparse.ArgumentTypeError(f"unknown command {command!r}")
+        try:
+            mix[command] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad weight {weight!r}")
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix needs a positive weight")
+    return mix
+
+
+def outcome_of(ctx):
+    """How an invocation ended, as seen by the user."""
+    if isinstance(ctx.error, commands.CommandOnCooldown):
+        return "cooldown"
+    if ctx.error is not None or ctx.command_failed:
+        return "error"
+    for message in ctx.channel.sent:
+        if any(embed.title == "⏳ Busy Right Now"
+               for embed in message.embeds):
+            return "busy"
+    return "ok"
+
+
+class LoadStage:
+    """One run at a fixed offered rate."""
+
+    def __init__(self, driver, rate, duration, users, mix, poisson, rng):
+        self.driver = driver
+        self.rate = rate
+        self.duration = duration
+        # Fresh users per stage, so cooldowns don't leak between stages
+        self.users = [synthetic_discord.SyntheticUser()
+                      for _ in range(users)]
+        self.mix = mix
+        self.poisson = poisson
+        self.rng = rng
+        self.latencies = {command: [] for command in mix}
+        self.outcomes = {command: Counter() for command in mix}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.last_finished = None
+
+    def arrivals(self):
+        """Offsets (seconds from start) at which requests are due."""
+        at = 0.0
+        while True:
+            at += (self.rng.expovariate(self.rate) if self.poisson
+                   else 1 / self.rate)
+            if at >= self.duration:
+                return
+            yield at
+
+    async def _one(self, command, user, due):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            ctx, _ = await self.driver.run(command, user)
+            outcome = outcome_of(ctx)
+        except Exception:
+            outcome = "exception"
+        finally:
+            self.in_flight -= 1
+        self.last_finished = time.perf_counter()
+        self.latencies[command].append(self.last_finished - due)
+        self.outcomes[command][outcome] += 1
+
+    async def run(self):
+        names, weights = zip(*self.mix.items())
+        tasks = []
+        schedule_lag = []
+        started = time.perf_counter()
+        for offset in self.arrivals():
+            due = started + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            schedule_lag.append(max(0.0, time.perf_counter() - due))
+            command = self.rng.choices(names, weights)[0]
+            user = self.rng.choice(self.users)
+            tasks.append(asyncio.ensure_future(
+                self._one(command, user, due)
+            ))
+        await asyncio.gather(*tasks)
+        elapsed = (self.last_finished or time.perf_counter()) - started
+        return self.report(len(tasks), elapsed, schedule_lag)
+
+    def report(self, offered, elapsed, schedule_lag):
+        every = [s for values in self.latencies.values() for s in values]
+        outcomes = sum(self.outcomes.values(), Counter())
+        per_command = {}
+        for command in self.mix:
+            summary = summarize(self.latencies[command])
+            summary["outcomes"] = dict(self.outcomes[command])
+            per_command[command] = summary
+        return {
+            "offered_rate": self.rate,
+            "offered": offered,
+            "completed": len(every),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(every) / elapsed, 2)
+            if elapsed else 0.0,
+            "ok_rps": round(outcomes["ok"] / elapsed, 2) if elapsed else 0.0,
+            "max_in_flight": self.max_in_flight,
+            # How late the generator itself issued requests; large values
+            # mean the loop was too busy to keep up the offered rate
+            "schedule_lag": summarize(schedule_lag),
+            "outcomes": dict(outcomes),
+            "latency": summarize(every),
+            "commands": per_command,
+        }
+
+
+async def run_load(args):
+    api = server_from_args(args)
+    base_url = await api.start()
+    workdir = tempfile.mkdtemp(prefix="mlbb-load-")
+    Main = import_bot(base_url, workdir, args)
+    rng = random.Random(args.seed)
+    stages = []
+    try:
+        await Main.UPSTREAM.start()
+        # Warm caches first, as a long-running bot would have them
+        await Main.fetch_and_cache_hero_data()
+        await Main.ingest_hero_ranks()
+        await synthetic_discord.attach(Main.bot)
+        driver = CommandDriver(
+            Main.bot, Main.ALLOWED_GUILD_IDS[0],
+            sorted(Main.HERO_ID_TO_NAME_MAP.values()), Main.TRIVIA_GAMES,
+        )
+        Main.SLOW_CALLBACK_DETECTOR.install()
+
+        for rate in args.rate:
+            lag = []
+            monitor = LoopLagMonitor(
+                interval=args.lag_interval, on_sample=lag.append,
+            )
+            requests_before = api.stats["requests"]
+            slow_before = Main.SLOW_CALLBACK_DETECTOR.total
+            monitor.start()
+            try:
+                result = await LoadStage(
+                    driver, rate, args.duration, args.users, args.mix,
+                    args.poisson, rng,
+                ).run()
+            finally:
+                monitor.stop()
+            result["loop_lag"] = summarize(lag)
+            result["slow_callbacks"] = (
+                Main.SLOW_CALLBACK_DETECTOR.total - slow_before
+            )
+            result["upstream_requests"] = (
+                api.stats["requests"] - requests_before
+            )
+            stages.append(result)
+            # Let cooldowns and the upstream limiter recover between stages
+            await asyncio.sleep(args.pause)
+    finally:
+        Main.SLOW_CALLBACK_DETECTOR.uninstall()
+        await Main.UPSTREAM.close()
+        await api.stop()
+
+    offenders = Main.SLOW_CALLBACK_DETECTOR.offenders.most_common(10)
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": int(time.time()),
+            "fixtures": api.source,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "etags": args.etags,
+            "upstream_rate": args.upstream_rate,
+            "upstream_burst": args.upstream_burst,
+            "duration": args.duration,
+            "users": args.users,
+            "mix": args.mix,
+            "arrivals": "poisson" if args.poisson else "uniform",
+        },
+        # Keyed by rate so --compare lines up stages of two runs
+        "results": {
+            f"rate_{stage['offered_rate']:g}": stage for stage in stages
+        },
+        "slow_callback_offenders": [
+            {"command": command, "stage": stage, "callback": callback,
+             "count": count}
+            for (command, stage, callback), count in offenders
+        ],
+    }
+
+
+def print_table(report, file):
+    print(f"{'rate':>7} {'done/s':>8} {'ok/s':>8} {'p50 ms':>9} "
+          f"{'p99 ms':>9} {'lag p99':>8} {'inflight':>8}  outcomes",
+          file=file)
+    for stage in report["results"].values():
+        latency = stage["latency"]
+        print(
+            f"{stage['offered_rate']:>7g} {stage['throughput_rps']:>8g} "
+            f"{stage['ok_rps']:>8g} {latency.get('p50_ms', 0):>9g} "
+            f"{latency.get('p99_ms', 0):>9g} "
+            f"{stage['loop_lag'].get('p99_ms', 0):>8g} "
+            f"{stage['max_in_flight']:>8}  {stage['outcomes']}",
+            file=file,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test the bot's commands without Discord."
+    )
+    add_server_arguments(parser)
+    parser.add_argument("--rate", type=float, nargs="+", default=[50.0],
+                        help="offered requests/second; several values run "
+                             "one stage each, in order")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="seconds per stage")
+    parser.add_argument("--users", type=int, default=200,
+                        help="synthetic users issuing the requests (each "
+                             "is subject to per-user cooldowns)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help=f"command weights (default {DEFAULT_MIX})")
+    parser.add_argument("--poisson", action="store_true",
+                        help="random (Poisson) arrivals instead of evenly "
+                             "spaced ones")
+    parser.add_argument("--pause", type=float, default=5.0,
+                        help="seconds idle between stages")
+    parser.add_argument("--lag-interval", type=float, default=0.05,
+                        help="loop lag sampling interval")
+    parser.add_argument("--upstream-rate", type=float, default=1000.0)
+    parser.add_argument("--upstream-burst", type=int, default=1000)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write JSON here (default stdout)")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="print changes against an earlier result file")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level, stream=sys.stderr)
+    report = asyncio.run(run_load(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    print_table(report, sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, report)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# Event-loop health: lag sampling and slow-callback detection.
+#
+# A background task sleeps for a fixed interval and measures how late it
+# wakes up. Anything that hogs the loop (CPU-bound work, blocking I/O)
+# shows up as lag, which also delays the Discord gateway heartbeat.
+#
+# To find *what* hogged it, SlowCallbackDetector times every callback the
+# loop runs and reports the ones over a threshold, tagged with the command
+# and stage that were active in that callback's context (see set_stage()).
+
+import asyncio
+import contextvars
+import time
+from collections import Counter, deque
+
+
+# Which command (or background job) and which step of it is running
+CURRENT_COMMAND = contextvars.ContextVar("current_command", default=None)
+CURRENT_STAGE = contextvars.ContextVar("current_stage", default=None)
+
+# Stages entered by the callback currently running; the loop runs one
+# callback at a time, so SlowCallbackDetector clears this before each.
+# Only collected while a detector is installed, since nothing else clears
+# it.
+_stages_entered = []
+_detectors_installed = 0
+
+
+def set_stage(name):
+    """Label the rest of the current task's loop work as stage ``name``.
+
+    A slow callback is attributed to every stage it passed through before
+    yielding, e.g. ``"handler->resolve->fetch"``.
+    """
+    CURRENT_STAGE.set(name)
+    if _detectors_installed:
+        _stages_entered.append(name)
+
+
+def describe_callback(handle):
+    """Readable name for what a loop handle runs, e.g. a coroutine."""
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", repr(coro))
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class LoopLagMonitor:
+    """Continuously sample how late the event loop runs a timer."""
+
+    def __init__(self, interval=0.5, on_sample=None, history=120):
+        self.interval = interval
+        self._on_sample = on_sample
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.samples = 0
+        self.recent = deque(maxlen=history)
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def percentile(self, fraction):
+        """Lag percentile over the recent samples."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    async def _run(self):
+        CURRENT_COMMAND.set("loop_lag_monitor")
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.samples += 1
+            self.recent.append(lag)
+            if self._on_sample is not None:
+                self._on_sample(lag)
+
+
+class SlowCallbackDetector:
+    """Report loop callbacks that run longer than ``threshold`` seconds.
+
+    Works by wrapping ``asyncio.Handle._run`` while installed, so it sees
+    every callback on every loop in the process. ``on_slow(event)`` gets a
+    dict with the duration, callback, command and stage.
+    """
+
+    def __init__(self, threshold=0.1, on_slow=None, history=50):
+        self.threshold = threshold
+        self._on_slow = on_slow
+        self.recent = deque(maxlen=history)
+        self.offenders = Counter()   # (command, stage, callback) -> count
+        self.total = 0
+        self._original_run = None
+
+    @property
+    def installed(self):
+        return self._original_run is not None
+
+    def install(self):
+        global _detectors_installed
+        if self.installed:
+            return
+        _detectors_installed += 1
+        original = self._original_run = asyncio.events.Handle._run
+        detector = self
+
+        def _run(handle):
+            stage_before = handle._context.get(CURRENT_STAGE)
+            _stages_entered.clear()
+            started = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                duration = time.perf_counter() - started
+                if duration >= detector.threshold:
+                    detector._report(handle, duration, stage_before)
+
+        asyncio.events.Handle._run = _run
+
+    def uninstall(self):
+        global _detectors_installed
+        if self.installed:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+            _detectors_installed -= 1
+            _stages_entered.clear()
+
+    def _report(self, handle, duration, stage_before):
+        context = handle._context
+        stages = [stage_before] if stage_before is not None else []
+        stages += [name for name in _stages_entered
+                   if not stages or name != stages[-1]]
+        event = {
+            "event": "slow_callback",
+            "duration_ms": round(duration * 1000, 1),
+            "callback": describe_callback(handle),
+            "command": context.get(CURRENT_COMMAND),
+            "stage": "->".join(stages) or None,
+            "at": time.time(),
+        }
+        self.total += 1
+        self.recent.append(event)
+        self.offenders[
+            (event["command"], event["stage"], event["callback"])
+        ] += 1
+        if self._on_slow is not None:
+            try:
+                self._on_slow(event)
+            except Exception:
+                pass  # Reporting must never break the loop
@@ -0,0 +1,101 @@
+# Button-driven embed pagination and a bounded registry of live views.
+#
+# Every page is rendered from data captured when the view was created, so
+# flipping pages never touches the API. Views time out on their own; the
+# registry additionally caps how many can be alive at once and expires the
+# oldest, so idle paginators don't pile up in memory.
+
+import asyncio
+from collections import OrderedDict
+
+import discord
+
+
+class ViewRegistry:
+    """Live views, oldest first, expired once there are too many."""
+
+    def __init__(self, max_views=50):
+        self.max_views = max_views
+        self._views = OrderedDict()    # id(view) -> view
+        self.stats = {"registered": 0, "evicted": 0}
+
+    def __len__(self):
+        return len(self._views)
+
+    def register(self, view):
+        self._views[id(view)] = view
+        view.registry = self
+        self.stats["registered"] += 1
+        while len(self._views) > self.max_views:
+            _, oldest = self._views.popitem(last=False)
+            self.stats["evicted"] += 1
+            oldest.expire()
+
+    def discard(self, view):
+        self._views.pop(id(view), None)
+
+
+class PaginatorView(discord.ui.View):
+    """Previous/next buttons over ``page_count`` pages from ``render``.
+
+    ``render(page)`` returns the embed for a zero-based page. Only the user
+    with ``author_id`` may flip pages.
+    """
+
+    def __init__(self, render, page_count, author_id, timeout=180):
+        super().__init__(timeout=timeout)
+        self._render = render
+        self.page = 0
+        self.page_count = page_count
+        self.author_id = author_id
+        self.message = None
+        self.registry = None
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message(
+                "Only the person who ran the command can flip pages.",
+                ephemeral=True,
+            )
+            return False
+        return True
+
+    async def _flip(self, interaction, step):
+        self.page = min(max(self.page + step, 0), self.page_count - 1)
+        self._update_buttons()
+        await interaction.response.edit_message(
+            embed=self._render(self.page), view=self
+        )
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        await self._flip(interaction, -1)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        await self._flip(interaction, 1)
+
+    async def on_timeout(self):
+        await self._disable()
+
+    def expire(self):
+        """Stop listening for clicks now and grey out the buttons."""
+        self.stop()
+        asyncio.ensure_future(self._disable())
+
+    async def _disable(self):
+        if self.registry is not None:
+            self.registry.discard(self)
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass  # Message deleted or no longer editable
+        self.message = None
@@ -0,0 +1,68 @@
+# Approximate request-frequency tracking for prefetching hot keys.
+#
+# A count-min sketch estimates how often each key was requested in fixed
+# memory, whatever the number of distinct keys. A small candidate set of
+# the heaviest keys seen so far makes the hottest keys cheap to list.
+# Counts are periodically decayed so popularity follows recent demand.
+
+
+class CountMinSketch:
+    """Frequency estimates that never undercount, in ``width * depth``."""
+
+    def __init__(self, width=512, depth=4):
+        self.width = width
+        self.depth = depth
+        self._rows = [[0] * width for _ in range(depth)]
+
+    def _cells(self, key):
+        for row in range(self.depth):
+            yield row, hash((row, key)) % self.width
+
+    def add(self, key, count=1):
+        """Count ``key`` and return its new estimate."""
+        estimate = None
+        for row, column in self._cells(key):
+            self._rows[row][column] += count
+            value = self._rows[row][column]
+            estimate = value if estimate is None else min(estimate, value)
+        return estimate
+
+    def estimate(self, key):
+        return min(self._rows[row][column] for row, column in self._cells(key))
+
+    def decay(self, factor=0.5):
+        """Scale every counter down, e.g. halve them."""
+        for row in self._rows:
+            for column, value in enumerate(row):
+                row[column] = int(value * factor)
+
+
+class PopularityTracker:
+    """Track the ``capacity`` most requested keys via a count-min sketch."""
+
+    def __init__(self, capacity=32, width=512, depth=4):
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        self._heavy = {}     # key -> estimated count, at most capacity keys
+
+    def record(self, key):
+        estimate = self.sketch.add(key)
+        if key in self._heavy or len(self._heavy) < self.capacity:
+            self._heavy[key] = estimate
+            return
+        coldest = min(self._heavy, key=self._heavy.get)
+        if estimate > self._heavy[coldest]:
+            del self._heavy[coldest]
+            self._heavy[key] = estimate
+
+    def hottest(self, n):
+        """Up to ``n`` keys, most requested first."""
+        return sorted(self._heavy, key=self._heavy.get, reverse=True)[:n]
+
+    def decay(self, factor=0.5):
+        self.sketch.decay(factor)
+        self._heavy = {
+            key: int(count * factor)
+            for key, count in self._heavy.items()
+            if int(count * factor) > 0
+        }
@@ -0,0 +1,69 @@
+# Offline job: generate OpenAI explanations for every (hero, counter) pair
+# in mlbb_hero_counters, so !mlbb counter rarely waits on OpenAI.
+#
+# Run from the bot's directory after the bot has written a hero snapshot:
+#   python prewarm_explanations.py
+# Explanation versions are derived from the snapshot's hero records, so the
+# snapshot must match the data the bot serves.
+
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from counter_hero_list import mlbb_hero_counters
+from counter_index import build_counter_index
+from explanations import ExplanationCache, openai_configured, pair_version
+from generalised_counter_reasoning import counter_groups
+from hero_snapshot import load_snapshot
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "4"))
+
+
+def counter_pairs(records, id_to_name):
+    """``(hero, counter, version)`` for every weak_against entry."""
+    index = build_counter_index(id_to_name, counter_groups,
+                                mlbb_hero_counters)
+    pairs = []
+    for hero_id, hero_name in id_to_name.items():
+        counters = index.counters_for(hero_id) or {}
+        for counter_id in counters.get("weak_against", ()):
+            pairs.append((
+                hero_name,
+                id_to_name[counter_id],
+                pair_version(records.get(hero_id), records.get(counter_id)),
+            ))
+    return pairs
+
+
+async def main():
+    load_dotenv()
+    if not openai_configured():
+        print("❌ OPENAI_API_KEY is not set.")
+        return 1
+
+    snapshot = load_snapshot(os.getenv(
+        "HERO_SNAPSHOT_PATH", os.path.join(BASE_DIR, "hero_snapshot.json.gz")
+    ))
+    if snapshot is None:
+        print("❌ No hero snapshot found. Start the bot once to create it.")
+        return 1
+
+    cache = ExplanationCache(os.getenv(
+        "EXPLANATION_CACHE_PATH",
+        os.path.join(BASE_DIR, "counter_explanations.json"),
+    ))
+    cache.load()
+    pairs = counter_pairs(snapshot["records"], snapshot["id_to_name"])
+    print(f"🔄 {len(pairs)} counter pairs, {len(cache)} cached explanations.")
+    generated = await cache.prewarm(pairs, concurrency=CONCURRENCY)
+    print(f"✅ Generated {generated} explanations "
+          f"({cache.stats['errors']} failed).")
+    return 0 if not cache.stats["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,158 @@
+# Adaptive token bucket that protects the upstream API.
+#
+# Only work that actually reaches upstream takes a token; answers served
+# from memory are free. Callers that find the bucket empty wait in FIFO
+# order and are told their queue position and ETA up front. The refill
+# rate follows upstream health: it is halved when the recent error rate
+# climbs and creeps back up while requests succeed. Only outcomes of
+# requests made while holding a token count (see holding_token()), so
+# background crawls can't raise the rate that commands are limited by.
+
+import asyncio
+import contextlib
+import contextvars
+import time
+from collections import deque
+
+
+# True inside holding_token(), and in the tasks started there
+_TOKEN_HELD = contextvars.ContextVar("upstream_token_held", default=False)
+
+
+def token_held():
+    """Whether the current request is made with an acquired token."""
+    return _TOKEN_HELD.get()
+
+
+@contextlib.contextmanager
+def holding_token(held=True):
+    """Mark upstream requests made in the block as using a token.
+
+    Wrap the request a token was acquired for, so its outcome (and only
+    its outcome) adapts the rate. ``held=False`` makes this a no-op.
+    """
+    if not held:
+        yield
+        return
+    marker = _TOKEN_HELD.set(True)
+    try:
+        yield
+    finally:
+        _TOKEN_HELD.reset(marker)
+
+
+class RateLimited(Exception):
+    """The wait for a token would exceed the limiter's ``max_wait``."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Upstream is busy; retry in {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose refill rate adapts to upstream error rates."""
+
+    def __init__(self, rate=1.0, capacity=5, min_rate=0.2, max_rate=5.0,
+                 max_wait=30.0, window=50, error_threshold=0.2,
+                 increase=0.02, decrease_interval=5.0):
+        self.rate = rate                  # Tokens per second
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_wait = max_wait
+        self.error_threshold = error_threshold
+        self.increase = increase
+        self.decrease_interval = decrease_interval
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._outcomes = deque(maxlen=window)   # True = success
+        self._lock = asyncio.Lock()             # FIFO among waiters
+        self._waiting = 0
+        self.stats = {"granted": 0, "queued": 0, "rejected": 0,
+                      "rate_decreases": 0}
+
+    @property
+    def queue_depth(self):
+        return self._waiting
+
+    @property
+    def error_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def estimate_wait(self, position):
+        """Seconds until the caller at queue ``position`` gets a token."""
+        self._refill()
+        return max(0.0, (position - self._tokens) / self.rate)
+
+    async def acquire(self, on_queued=None):
+        """Take one token, waiting in line if the bucket is empty.
+
+        ``on_queued(position, eta)`` is called once if the caller has to
+        wait. It runs as its own task after the caller has taken its place
+        in line, so a slow notification can't change the order; it is
+        awaited before returning. Raises :class:`RateLimited` instead of
+        queueing when the wait would exceed ``max_wait``. Returns the
+        seconds waited.
+        """
+        self._refill()
+        if not self._waiting and self._tokens >= 1:
+            self._tokens -= 1
+            self.stats["granted"] += 1
+            return 0.0
+
+        position = self._waiting + 1
+        eta = self.estimate_wait(position)
+        if eta > self.max_wait:
+            self.stats["rejected"] += 1
+            raise RateLimited(eta)
+
+        self._waiting += 1
+        self.stats["queued"] += 1
+        started = time.monotonic()
+        notice = None
+        if on_queued is not None:
+            notice = asyncio.ensure_future(on_queued(position, eta))
+        try:
+            # No await before this: the lock queues waiters in FIFO order
+            async with self._lock:
+                self._refill()
+                while self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    self._refill()
+                self._tokens -= 1
+        except BaseException:
+            if notice is not None:
+                notice.cancel()
+            raise
+        finally:
+            self._waiting -= 1
+        self.stats["granted"] += 1
+        if notice is not None:
+            await notice   # So the notice comes before the caller's reply
+        return time.monotonic() - started
+
+    def record(self, ok):
+        """Feed one upstream outcome into the rate adaptation.
+
+        Callers should only record requests that took a token.
+        """
+        self._outcomes.append(ok)
+        self._refill()   # Bank tokens earned at the old rate
+        now = time.monotonic()
+        if ok:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+        elif (self.error_rate > self.error_threshold
+              and now - self._last_decrease >= self.decrease_interval):
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._last_decrease = now
+            self.stats["rate_decreases"] += 1
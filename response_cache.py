@@ -0,0 +1,84 @@
+# Memoized command responses.
+#
+# A command whose output depends only on its arguments and the data it
+# reads renders each response once per (command, normalized arguments,
+# data version). Repeat calls rebuild the embed from the stored payload
+# and only set the per-user footer. Each command remembers the data
+# version its entries were rendered from; the first lookup with a newer
+# version drops them all, so a refresh invalidates stale responses
+# without any explicit hook.
+
+import discord
+
+from caching import LRUCache
+
+
+class ResponseCache:
+    """``(command, args, version) -> payload`` with per-command LRUs."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._commands = {}   # command -> (version, LRUCache)
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0,
+                      "invalidations": 0}
+
+    def __len__(self):
+        return sum(len(entries) for _, entries in self._commands.values())
+
+    def _entries(self, command, version):
+        current = self._commands.get(command)
+        if current is not None and current[0] == version:
+            return current[1]
+        if current is not None:
+            self.stats["invalidations"] += 1
+            self.stats["evictions"] += current[1].stats["evictions"]
+        entries = LRUCache(self.maxsize)
+        self._commands[command] = (version, entries)
+        return entries
+
+    def get(self, command, args, version=None):
+        """The stored payload, or ``None`` if it must be rendered."""
+        payload = self._entries(command, version).get(args)
+        self.stats["hits" if payload is not None else "misses"] += 1
+        return payload
+
+    def put(self, command, args, version, payload):
+        self._entries(command, version).set(args, payload)
+        return payload
+
+    def memoize(self, command, args, version, render):
+        """The stored payload, calling ``render()`` to make it on a miss.
+
+        ``args=None`` renders without caching, for callers that can't tell
+        which data version they hold.
+        """
+        if args is None:
+            return render()
+        payload = self.get(command, args, version)
+        if payload is None:
+            payload = self.put(command, args, version, render())
+        return payload
+
+    def invalidate(self, command=None):
+        """Drop one command's responses, or everyone's."""
+        if command is None:
+            self._commands.clear()
+        else:
+            self._commands.pop(command, None)
+
+
+def embed_payload(embed):
+    """Freeze a rendered embed (without its footer) for the cache."""
+    return embed.to_dict()
+
+
+def embed_from_payload(payload, footer=None):
+    """A new embed from a cached payload, with this call's footer.
+
+    The embed shares the payload's field list, so callers may only set
+    the footer, never add or edit fields.
+    """
+    embed = discord.Embed.from_dict(payload)
+    if footer is not None:
+        embed.set_footer(text=footer)
+    return embed
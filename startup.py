@@ -0,0 +1,35 @@
+# Startup phase timing.
+#
+# Main imports this module before anything else, so the clock starts
+# before the heavy imports. Each phase is timed from the end of the
+# previous one, and time-to-ready is measured from the same start.
+# Interpreter start-up before Main runs is not included.
+
+import time
+
+
+class StartupTimer:
+    """Durations of named startup phases, and time to first readiness."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}               # phase -> seconds, in order
+        self.time_to_ready = None
+        self._last = self.started
+
+    def mark(self, phase):
+        """End ``phase`` now and return how long it took."""
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+        return self.phases[phase]
+
+    def ready(self):
+        """Record time-to-ready the first time; True only that time."""
+        if self.time_to_ready is not None:
+            return False
+        self.time_to_ready = time.perf_counter() - self.started
+        return True
+
+
+STARTUP = StartupTimer()
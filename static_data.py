@@ -0,0 +1,149 @@
+# Precompiled static hero data.
+#
+# hero_list.py, counter_hero_list.py and generalised_counter_reasoning.py
+# are large hand-edited dict literals, and every hero name in the counter
+# data has to be matched (sometimes fuzzily) against the hero list before
+# use. This module compiles all three, plus those name matches, into one
+# marshal file. The saving is mostly the name matching: with the matches
+# precomputed, building the counter index skips the fuzzy resolver and
+# never imports thefuzz. The file records a fingerprint of its sources and
+# of the Python version, and is rebuilt automatically whenever either
+# changes.
+#
+#   python static_data.py        # rebuild the artifact now
+
+import hashlib
+import importlib
+import logging
+import marshal
+import os
+import sys
+import time
+
+from bot_logging import get_logger, log_event
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_PATH = os.getenv(
+    "STATIC_DATA_PATH", os.path.join(BASE_DIR, "static_data.marshal")
+)
+SOURCES = ("hero_list", "counter_hero_list", "generalised_counter_reasoning")
+# The name matches also depend on the matching code
+MATCHER_SOURCES = ("counter_index", "hero_resolver")
+FORMAT_VERSION = 1
+
+log = get_logger("static_data")
+
+
+def source_fingerprint():
+    """Hash of the data and matcher sources, format and Python version.
+
+    marshal data is only readable by the Python version that wrote it, so
+    the version is part of the fingerprint.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{FORMAT_VERSION}|{sys.version}".encode())
+    for module in SOURCES + MATCHER_SOURCES:
+        with open(os.path.join(BASE_DIR, f"{module}.py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def match_counter_names(hero_names, counter_groups, hero_counters):
+    """``{data name: (hero name or None, kind, score)}`` for every name.
+
+    Matches hero names used in the counter data against ``hero_names``,
+    the way counter_index.build_counter_index would at runtime.
+    """
+    # Imported here: it pulls in the fuzzy matcher, which a fresh
+    # artifact lets startup skip
+    from counter_index import build_counter_index
+
+    index = build_counter_index(
+        {name: name for name in hero_names}, counter_groups, hero_counters
+    )
+    names = set(hero_counters)
+    for lists in hero_counters.values():
+        if isinstance(lists, dict):
+            for side in ("weak_against", "strong_against"):
+                names.update(lists.get(side, ()))
+    for group in counter_groups.values():
+        names.update(group.get("heroes", ()))
+
+    corrections = {
+        item["name"]: (item["resolved"], item["kind"], item["score"])
+        for item in index.report
+    }
+    lowered = {name.lower(): name for name in hero_names}
+    return {
+        name: corrections.get(name, (lowered.get(name.strip().lower()),
+                                     "exact", 100))
+        for name in names
+    }
+
+
+def compile_static_data():
+    """Build the artifact contents from the source modules."""
+    modules = {name: importlib.import_module(name) for name in SOURCES}
+    hero_dict = modules["hero_list"].hero_dict
+    counter_groups = modules["generalised_counter_reasoning"].counter_groups
+    hero_counters = modules["counter_hero_list"].mlbb_hero_counters
+    return {
+        "fingerprint": source_fingerprint(),
+        "hero_dict": hero_dict,
+        "counter_groups": counter_groups,
+        "hero_counters": hero_counters,
+        "name_matches": match_counter_names(
+            hero_dict, counter_groups, hero_counters
+        ),
+    }
+
+
+def save_static_data(data, path=ARTIFACT_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        marshal.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_static_data(path=ARTIFACT_PATH):
+    """The static data, from the artifact when it is up to date.
+
+    A missing, unreadable or outdated artifact is rebuilt from the source
+    modules (and saved, if the directory is writable).
+    """
+    started = time.perf_counter()
+    fingerprint = source_fingerprint()
+    try:
+        with open(path, "rb") as f:
+            # One read and loads() is far quicker than load()'s small reads
+            data = marshal.loads(f.read())
+        if data.get("fingerprint") == fingerprint:
+            log_event(log, logging.DEBUG, "static_data_loaded",
+                      duration_ms=round(
+                          (time.perf_counter() - started) * 1000, 2))
+            return data
+        reason = "outdated"
+    except FileNotFoundError:
+        reason = "missing"
+    except (OSError, EOFError, ValueError, TypeError, AttributeError) as e:
+        reason = f"unreadable: {e}"
+
+    data = compile_static_data()
+    try:
+        save_static_data(data, path)
+    except OSError as e:
+        log.warning("Could not save static data artifact: %s", e)
+    log_event(log, logging.INFO, "static_data_compiled",
+              f"Compiled static data artifact ({reason})",
+              reason=reason, path=path,
+              duration_ms=round((time.perf_counter() - started) * 1000, 2))
+    return data
+
+
+if __name__ == "__main__":
+    from bot_logging import configure_logging
+
+    configure_logging("INFO")
+    save_static_data(compile_static_data())
+    print(f"Wrote {ARTIFACT_PATH}")
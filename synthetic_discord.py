@@ -0,0 +1,156 @@
+# Synthetic Discord objects for running commands without a gateway.
+#
+# Benchmarks and load tests build fake messages and push them through the
+# bot's normal command pipeline (prefix parsing, checks, cooldowns, hooks
+# and error handlers) with Bot.invoke. Replies are recorded on the fake
+# channel instead of being sent to Discord.
+
+import asyncio
+import itertools
+
+import discord
+from discord.ext import commands
+
+
+_snowflakes = itertools.count(10 ** 17)
+
+
+class SyntheticUser:
+    """Stand-in for a ``discord.Member``."""
+
+    def __init__(self, user_id=None, name=None, bot=False):
+        self.id = user_id or next(_snowflakes)
+        self.name = name or f"user{self.id}"
+        self.display_name = self.global_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.bot = bot
+
+    def __str__(self):
+        return self.name
+
+
+class SyntheticGuild:
+    def __init__(self, guild_id, name="Synthetic Guild"):
+        self.id = guild_id
+        self.name = name
+
+
+class SyntheticChannel:
+    """Text channel that records what the bot sends to it."""
+
+    type = discord.ChannelType.text
+
+    def __init__(self, guild, channel_id=None, permissions=None):
+        self.id = channel_id or next(_snowflakes)
+        self.guild = guild
+        self.name = f"channel{self.id}"
+        self.sent = []
+        self._permissions = (
+            discord.Permissions.all() if permissions is None else permissions
+        )
+        self._new_message = asyncio.Event()
+
+    def permissions_for(self, member):
+        return self._permissions
+
+    def record(self, message):
+        self.sent.append(message)
+        self._new_message.set()
+
+    async def wait_for_reply(self, count=1):
+        """Wait until the bot has sent at least ``count`` messages here."""
+        while len(self.sent) < count:
+            self._new_message.clear()
+            await self._new_message.wait()
+        return self.sent[count - 1]
+
+
+class SyntheticMessage:
+    """Stand-in for a ``discord.Message``, sent by a user or the bot."""
+
+    type = discord.MessageType.default
+    webhook_id = None
+
+    def __init__(self, state, content, author, channel, embed=None,
+                 view=None):
+        self._state = state
+        self.id = next(_snowflakes)
+        self.content = content or ""
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.embeds = [embed] if embed is not None else []
+        self.view = view
+        self.created_at = discord.utils.utcnow()
+        self.edited_at = None
+        self.mentions = []
+        self.role_mentions = []
+        self.channel_mentions = []
+        self.attachments = []
+
+    async def edit(self, content=None, embed=None, view=None, **kwargs):
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        self.view = view
+        return self
+
+    async def delete(self, **kwargs):
+        pass
+
+
+class SyntheticContext(commands.Context):
+    """Context whose replies are recorded instead of sent."""
+
+    async def send(self, content=None, *, embed=None, view=None, **kwargs):
+        message = SyntheticMessage(
+            self._state, content, self.bot.user, self.channel,
+            embed=embed, view=view,
+        )
+        self.channel.record(message)
+        return message
+
+
+async def attach(bot, bot_user=None):
+    """Make ``bot`` able to run commands and ``wait_for`` with no gateway.
+
+    Normally done by ``login()``: binds the bot to the running loop and
+    gives it a user, which context parsing and listeners rely on. The bot
+    user also becomes the owner, so ``is_owner()`` checks never call the
+    Discord API (and fail for every synthetic user).
+    """
+    await bot._async_setup_hook()
+    bot._connection.user = bot_user or SyntheticUser(name="bot", bot=True)
+    if bot.owner_id is None and not bot.owner_ids:
+        bot.owner_id = bot.user.id
+
+
+async def invoke(bot, content, author, channel):
+    """Run ``content`` as if ``author`` posted it in ``channel``.
+
+    Returns the context, with replies in ``ctx.channel.sent`` and
+    ``ctx.command_failed``/``ctx.error`` describing the outcome.
+    """
+    message = SyntheticMessage(bot._connection, content, author, channel)
+    ctx = await bot.get_context(message, cls=SyntheticContext)
+    ctx.error = None
+    if ctx.command is None:
+        ctx.error = commands.CommandNotFound(content)
+        return ctx
+    try:
+        if not await bot.can_run(ctx, call_once=True):
+            raise commands.CheckFailure("Global check failed.")
+        await ctx.command.invoke(ctx)
+    except commands.CommandError as e:
+        ctx.error = e
+        ctx.command_failed = True
+        await ctx.command.dispatch_error(ctx, e)
+    return ctx
+
+
+def post(bot, content, author, channel):
+    """Dispatch a plain (non-command) message, e.g. a trivia answer."""
+    message = SyntheticMessage(bot._connection, content, author, channel)
+    bot.dispatch("message", message)
+    return message
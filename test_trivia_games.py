@@ -0,0 +1,71 @@
+from hero_records import HeroRecord
+from trivia_bank import build_question_bank
+from trivia_games import is_correct
+
+
+RECORDS = {
+    "1": HeroRecord("1", "Layla", roles=("Marksman",), lanes=("Gold Lane",),
+                    skill_names=("Malefic Gun",)),
+    "2": HeroRecord("2", "Miya", roles=("Marksman",), lanes=("Gold Lane",),
+                    skill_names=("Moon Blessing",)),
+    "3": HeroRecord("3", "Lesley", roles=("Marksman", "Assassin"),
+                    lanes=("Gold Lane",),
+                    skill_names=("Master of Camouflage",)),
+    "4": HeroRecord("4", "Eudora", roles=("Mage",), lanes=("Mid Lane",),
+                    skill_names=("Forked Lightning",)),
+    "5": HeroRecord("5", "X.Borg", roles=("Fighter", "Mage", "Tank"),
+                    lanes=("EXP Lane",), skill_names=("Fire Missiles",)),
+    "6": HeroRecord("6", "Sun", skill_names=("Simian Pillar",)),
+    "7": HeroRecord("7", "Yi Sun-shin", skill_names=("Dragon Spirit",)),
+}
+BANK = build_question_bank(RECORDS)
+
+
+def question(kind, answer):
+    return next(q for q in BANK.questions
+                if q.kind == kind and q.answer == answer)
+
+
+def test_exact_and_near_answers_win():
+    assert is_correct("Mage", question("role", "Mage"))
+    assert is_correct("  MAGE ", question("role", "Mage"))
+    assert is_correct("layla", question("skill", "Layla"))
+    assert is_correct("lesly", question("skill", "Lesley"))
+    assert is_correct("xborg", question("skill", "X.Borg"))
+    assert is_correct("gold lane", question("lane", "Gold Lane"))
+    # Another hero's name inside the answer isn't a second option
+    assert is_correct("yi sun shin", question("skill", "Yi Sun-shin"))
+
+
+def test_any_accepted_answer_wins():
+    roles = question("role", "Fighter / Mage / Tank")
+    assert is_correct("tank", roles)
+    assert is_correct("fighter", roles)
+
+
+def test_single_letters_and_short_fragments_lose():
+    for guess in ("m", "ma", "mag"):
+        assert not is_correct(guess, question("role", "Mage"))
+    for guess in ("a", "la", "lay"):
+        assert not is_correct(guess, question("skill", "Layla"))
+
+
+def test_substrings_of_the_answer_lose():
+    assert not is_correct("lane", question("lane", "Gold Lane"))
+    assert not is_correct("gold", question("lane", "Gold Lane"))
+    assert not is_correct("marks", question("role", "Marksman"))
+
+
+def test_naming_several_options_loses():
+    roles = question("role", "Fighter / Mage / Tank")
+    assert not is_correct("fighter mage tank", roles)
+    assert not is_correct("mage or tank", roles)
+    assert not is_correct("layla miya lesley", question("skill", "Layla"))
+    assert not is_correct("layla miya", question("skill", "Layla"))
+    assert not is_correct("sun yi sun shin", question("skill", "Sun"))
+    assert not is_correct("gold lane mid lane", question("lane", "Gold Lane"))
+
+
+def test_blank_guess_loses():
+    assert not is_correct("", question("skill", "Layla"))
+    assert not is_correct(" ?! ", question("skill", "Layla"))
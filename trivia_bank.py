@@ -0,0 +1,243 @@
+# Precomputed trivia questions and per-channel, no-repeat question decks.
+#
+# The whole question bank is generated when hero data or rankings are
+# ingested, from HeroRecords and hero-rank tables, so starting a game only
+# draws from a deck. Each channel (and difficulty) gets its own lazily
+# shuffled deck: every question comes up once before any repeats, and a
+# draw is O(1) however large the bank is.
+
+import random
+import re
+
+from caching import LRUCache
+from hero_stats import METRICS
+
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+BACKGROUND_MIN_LENGTH = 50     # Shorter stories make no background question
+EXCERPT_MIN_LENGTH = 40        # Skip sentences too short to be a clue
+EXCERPT_MAX_LENGTH = 150       # Longer sentences are truncated
+EXCERPTS_PER_HERO = 2
+REDACTED = "▢▢▢"
+
+# Kinds whose answer is a label (a role, ...) rather than a hero's name
+LABEL_KINDS = ("role", "lane", "specialty")
+
+# (metric, highest?) pairs that make a stat question for every rank window
+STAT_QUESTIONS = (
+    ("win", True), ("win", False), ("pick", True), ("ban", True),
+)
+
+
+def normalize_answer(text):
+    """Lowercase words only, e.g. ``"X.Borg"`` -> ``"x borg"``."""
+    return " ".join(re.findall(r"[^\W_]+", text.lower()))
+
+
+class TriviaQuestion:
+    """One question with every answer that counts as correct.
+
+    ``choices`` are all the answers a question of this kind could have
+    (every role, or every hero name, ...), shared between questions. Like
+    ``accepted``, they are normalized with normalize_answer().
+    """
+
+    __slots__ = ("kind", "difficulty", "text", "answer", "accepted",
+                 "choices")
+
+    def __init__(self, kind, difficulty, text, answer, accepted,
+                 choices=()):
+        self.kind = kind
+        self.difficulty = difficulty
+        self.text = text
+        self.answer = answer                  # Shown after the round
+        self.accepted = tuple(normalize_answer(a) for a in accepted)
+        self.choices = choices
+
+    def __repr__(self):
+        return f"TriviaQuestion({self.kind!r}, {self.text!r})"
+
+
+class TriviaBank:
+    """All generated questions, grouped by difficulty."""
+
+    def __init__(self, questions, version=None):
+        self.questions = tuple(questions)
+        self.version = version
+        self.pools = {None: self.questions}
+        for difficulty in DIFFICULTIES:
+            self.pools[difficulty] = tuple(
+                q for q in self.questions if q.difficulty == difficulty
+            )
+
+    def __len__(self):
+        return len(self.questions)
+
+    def counts(self):
+        """``{(kind, difficulty): number of questions}``."""
+        counts = {}
+        for q in self.questions:
+            key = (q.kind, q.difficulty)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+def _name_pattern(name):
+    """Matches a hero's name, or any distinctive word of it."""
+    words = {name} | {w for w in re.split(r"[\s\-]+", name) if len(w) >= 4}
+    longest_first = sorted(words, key=len, reverse=True)
+    return re.compile(
+        "|".join(re.escape(w) for w in longest_first), re.IGNORECASE
+    )
+
+
+def _hero_questions(record, skill_owners):
+    name = record.name
+    if record.roles:
+        yield TriviaQuestion(
+            "role", "easy",
+            f"Which **role** does **{name}** belong to?",
+            " / ".join(record.roles), record.roles,
+        )
+    if record.lanes:
+        yield TriviaQuestion(
+            "lane", "easy",
+            f"Which **lane** is recommended for **{name}**?",
+            " / ".join(record.lanes), record.lanes,
+        )
+    if record.specialties:
+        yield TriviaQuestion(
+            "specialty", "medium",
+            f"Name one of **{name}**'s **specialties**.",
+            " / ".join(record.specialties), record.specialties,
+        )
+
+    pattern = _name_pattern(name)
+    for skill in record.skill_names:
+        # Skip skills shared by several heroes or that give the name away
+        if skill_owners.get(skill.lower()) != 1 or pattern.search(skill):
+            continue
+        yield TriviaQuestion(
+            "skill", "medium",
+            f"Which hero has the skill **{skill}**?", name, (name,),
+        )
+
+    if len(record.background) < BACKGROUND_MIN_LENGTH:
+        return
+    excerpts = [
+        s for s in record.background_sentences
+        if len(s) >= EXCERPT_MIN_LENGTH
+    ][:EXCERPTS_PER_HERO]
+    for excerpt in excerpts:
+        if len(excerpt) > EXCERPT_MAX_LENGTH:
+            excerpt = excerpt[:EXCERPT_MAX_LENGTH] + "..."
+        excerpt = pattern.sub(REDACTED, excerpt)
+        yield TriviaQuestion(
+            "background", "hard",
+            f"I am thinking of a hero whose background story includes: "
+            f"\"*{excerpt}*\". Who is this hero?",
+            name, (name,),
+        )
+
+
+def _stat_questions(key, table):
+    rank, days = key
+    scope = "all ranks" if rank == "all" else f"**{rank.title()}** rank"
+    for metric, highest in STAT_QUESTIONS:
+        best = table.top(metric, 1, ascending=not highest)
+        if not len(best):
+            continue
+        name = str(table.names[best[0]])
+        label = METRICS[metric][1].lower()
+        yield TriviaQuestion(
+            "stat", "hard",
+            f"Which hero has the **{'highest' if highest else 'lowest'} "
+            f"{label}** in {scope} over the last {days} days?",
+            name, (name,),
+        )
+
+
+def build_question_bank(records, rank_tables=None, version=None):
+    """Generate every question from hero records and hero-rank tables.
+
+    ``records`` maps hero ID to HeroRecord; ``rank_tables`` maps a
+    ``(rank, days)`` window to its HeroStatsTable.
+    """
+    skill_owners = {}
+    for record in records.values():
+        for skill in set(s.lower() for s in record.skill_names):
+            skill_owners[skill] = skill_owners.get(skill, 0) + 1
+
+    questions = []
+    for hero_id in sorted(records):
+        questions.extend(_hero_questions(records[hero_id], skill_owners))
+    for key, table in sorted((rank_tables or {}).items()):
+        if table is not None and len(table):
+            questions.extend(_stat_questions(key, table))
+
+    # Questions not about a label have a hero's name as the answer
+    choices = {"hero": {normalize_answer(r.name) for r in records.values()}}
+    for question in questions:
+        kind = question.kind if question.kind in LABEL_KINDS else "hero"
+        choices.setdefault(kind, set()).update(question.accepted)
+    choices = {kind: tuple(sorted(names)) for kind, names in choices.items()}
+    for question in questions:
+        question.choices = choices[
+            question.kind if question.kind in LABEL_KINDS else "hero"
+        ]
+    return TriviaBank(questions, version)
+
+
+class ShuffledDeck:
+    """Draws ``0..size-1`` in random order, each once per pass.
+
+    A lazy Fisher-Yates shuffle: only the swapped positions are stored, so
+    creating a deck and drawing from it are both O(1).
+    """
+
+    __slots__ = ("version", "size", "remaining", "_swaps")
+
+    def __init__(self, size, version=None):
+        self.version = version
+        self.size = size
+        self.remaining = size
+        self._swaps = {}
+
+    def draw(self, rng):
+        if not self.remaining:
+            # Every question has been asked: start a new pass
+            self.remaining = self.size
+            self._swaps.clear()
+        pick = rng.randrange(self.remaining)
+        last = self.remaining - 1
+        value = self._swaps.get(pick, pick)
+        self._swaps[pick] = self._swaps.pop(last, last)
+        self.remaining = last
+        return value
+
+
+class TriviaDecks:
+    """Per-channel decks over a TriviaBank.
+
+    A deck is reshuffled when the bank's version or the size of its pool
+    changes, so it never indexes into a different question list. Banks
+    rebuilt with the same version must keep every question's position.
+    """
+
+    def __init__(self, max_channels=1000, seed=None):
+        self._decks = LRUCache(max_channels)
+        self._rng = random.Random(seed)
+
+    def draw(self, bank, channel_id, difficulty=None):
+        """Next question for ``channel_id``, or ``None`` if none exist."""
+        pool = bank.pools.get(difficulty, ())
+        if not pool:
+            return None
+        key = (channel_id, difficulty)
+        deck = self._decks.get(key)
+        if deck is None or deck.version != bank.version \
+                or deck.size != len(pool):
+            deck = ShuffledDeck(len(pool), bank.version)
+            self._decks.set(key, deck)
+        return pool[deck.draw(self._rng)]
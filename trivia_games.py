@@ -0,0 +1,146 @@
+# Running trivia games and the single dispatcher that routes answers.
+#
+# Instead of one bot.wait_for() predicate per game, which discord.py tests
+# against every message the bot sees, one on_message listener looks the
+# channel up in a dict and hands the message to that channel's game only.
+# The work per message is one dict lookup (plus judging the guess when the
+# channel has a game), however many games are running.
+
+import asyncio
+import time
+from collections import Counter
+
+from trivia_bank import normalize_answer
+
+
+ANSWER_THRESHOLD = 88       # fuzz.ratio that counts as correct
+MIN_GUESS_LENGTH = 3        # Shorter guesses must match the answer exactly
+GUESSES_PER_USER = 3        # Per round, so options can't just be spammed
+
+
+def options_named(guess, question):
+    """The question's choices that appear as whole words in ``guess``.
+
+    A choice that is only part of a longer one named in the guess ("sun"
+    in "yi sun shin") doesn't count separately.
+    """
+    padded = f" {guess} "
+    named = [choice for choice in question.choices or question.accepted
+             if f" {choice} " in padded]
+    return [choice for choice in named
+            if not any(choice != other and f" {choice} " in f" {other} "
+                       for other in named)]
+
+
+def is_correct(guess, question):
+    """Whether ``guess`` names the question's answer, and only that.
+
+    Each accepted answer is compared with the whole guess, so a fragment
+    ("ma" for Mage) or a list of candidates ("fighter mage tank") scores
+    too low; a guess naming more than one possible answer is rejected
+    outright.
+    """
+    from thefuzz import fuzz      # Imported on first use, like hero_resolver
+
+    guess = normalize_answer(guess)
+    if not guess:
+        return False
+    if len(guess) < MIN_GUESS_LENGTH:
+        return guess in question.accepted
+    if len(options_named(guess, question)) > 1:
+        return False
+    return any(
+        fuzz.ratio(guess, accepted) >= ANSWER_THRESHOLD
+        for accepted in question.accepted
+    )
+
+
+class TriviaGame:
+    """One channel's game: a sequence of rounds with a running score."""
+
+    def __init__(self, channel_id, guesses_per_user=GUESSES_PER_USER):
+        self.channel_id = channel_id
+        self.guesses_per_user = guesses_per_user
+        self.question = None
+        self.scores = Counter()        # user id -> rounds won
+        self.players = {}              # user id -> display name
+        self.guesses = 0
+        self._winner = None
+        self._asked_at = None
+        self._round_guesses = Counter()
+
+    async def ask(self, question, timeout):
+        """Open a round; return ``(message, seconds)`` for the first
+        correct answer, or ``None`` if time runs out.
+        """
+        self.question = question
+        self._round_guesses.clear()
+        self._winner = asyncio.get_running_loop().create_future()
+        self._asked_at = time.perf_counter()
+        try:
+            return await asyncio.wait_for(self._winner, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.question = None
+
+    def guess(self, message):
+        """Judge one message; True if it won the round."""
+        if self.question is None or self._winner.done():
+            return False
+        author = message.author
+        if self._round_guesses[author.id] >= self.guesses_per_user:
+            return False
+        self._round_guesses[author.id] += 1
+        self.guesses += 1
+        if not is_correct(message.content, self.question):
+            return False
+        self.scores[author.id] += 1
+        self.players[author.id] = getattr(author, "display_name", str(author))
+        self._winner.set_result(
+            (message, time.perf_counter() - self._asked_at)
+        )
+        return True
+
+    def standings(self):
+        """``[(name, points), ...]``, best first."""
+        return [(self.players[user_id], points)
+                for user_id, points in self.scores.most_common()]
+
+
+class TriviaDispatcher:
+    """Active games by channel ID, and the router for their answers."""
+
+    def __init__(self, ignore_prefix=None):
+        self.ignore_prefix = ignore_prefix
+        self._games = {}
+        self.stats = {"routed": 0, "games": 0}
+
+    def __len__(self):
+        return len(self._games)
+
+    def get(self, channel_id):
+        return self._games.get(channel_id)
+
+    def start(self, channel_id, **kwargs):
+        """Register a new game, or return ``None`` if one is running."""
+        if channel_id in self._games:
+            return None
+        game = self._games[channel_id] = TriviaGame(channel_id, **kwargs)
+        self.stats["games"] += 1
+        return game
+
+    def end(self, channel_id):
+        self._games.pop(channel_id, None)
+
+    def dispatch(self, message):
+        """Route ``message`` to its channel's game, if it has one."""
+        game = self._games.get(message.channel.id)
+        if game is None or message.author.bot:
+            return False
+        if self.ignore_prefix and message.content.startswith(
+            self.ignore_prefix
+        ):
+            return False
+        self.stats["routed"] += 1
+        return game.guess(message)
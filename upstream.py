@@ -0,0 +1,239 @@
+# Shared, pooled HTTP client for the MLBB stats API.
+#
+# One instance is owned by the bot: it is started in ``setup_hook`` and
+# closed when the bot shuts down, so every command reuses the same
+# keep-alive connections instead of paying a TCP+TLS handshake per call.
+# Identical concurrent requests are coalesced into a single upstream call.
+
+import asyncio
+import hashlib
+import time
+
+import aiohttp
+
+
+# Connection pool tuning
+POOL_LIMIT = 50              # Total open sockets across all hosts
+POOL_LIMIT_PER_HOST = 20     # Sockets to api-mobilelegends.vercel.app
+KEEPALIVE_TIMEOUT = 30       # Seconds an idle socket is kept for reuse
+DNS_CACHE_TTL = 300          # Seconds a DNS answer is cached
+
+# Request timeouts (seconds)
+TOTAL_TIMEOUT = 20
+CONNECT_TIMEOUT = 5
+SOCK_READ_TIMEOUT = 15
+
+
+def is_upstream_failure(error):
+    """Whether ``error`` says upstream is unhealthy (not a bad request)."""
+    if isinstance(error, aiohttp.ContentTypeError):
+        return True   # Usually an HTML error page from the host
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500 or error.status == 429
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+class UpstreamClient:
+    """Bot-wide HTTP client with a tuned connection pool and statistics.
+
+    ``on_result(ok, status, latency)`` is called after every request with
+    whether upstream answered healthily, the HTTP status (``None`` for
+    network errors) and the seconds taken, e.g. to feed a rate limiter.
+    """
+
+    def __init__(self, base_url, on_result=None):
+        self.base_url = base_url
+        self._on_result = on_result
+        self._session = None
+        self._in_flight = {}   # request key -> asyncio.Task
+        self._stats = {
+            "requests": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+            "not_modified": 0,
+            "bytes_received": 0,
+            "total_latency": 0.0,
+        }
+
+    @property
+    def is_open(self):
+        return self._session is not None and not self._session.closed
+
+    async def start(self):
+        """Create the pooled session. Safe to call more than once."""
+        if self.is_open:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            use_dns_cache=True,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=TOTAL_TIMEOUT,
+            connect=CONNECT_TIMEOUT,
+            sock_read=SOCK_READ_TIMEOUT,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            trace_configs=[self._build_trace_config()],
+        )
+
+    async def close(self):
+        """Close the session and release every pooled connection."""
+        if self.is_open:
+            await self._session.close()
+        self._session = None
+
+    def _build_trace_config(self):
+        """Count connection reuse and DNS cache behaviour via aiohttp."""
+        trace = aiohttp.TraceConfig()
+
+        async def on_create(session, ctx, params):
+            self._stats["connections_created"] += 1
+
+        async def on_reuse(session, ctx, params):
+            self._stats["connections_reused"] += 1
+
+        async def on_dns_hit(session, ctx, params):
+            self._stats["dns_cache_hits"] += 1
+
+        async def on_dns_miss(session, ctx, params):
+            self._stats["dns_cache_misses"] += 1
+
+        trace.on_connection_create_end.append(on_create)
+        trace.on_connection_reuseconn.append(on_reuse)
+        trace.on_dns_cache_hit.append(on_dns_hit)
+        trace.on_dns_cache_miss.append(on_dns_miss)
+        return trace
+
+    def url_for(self, path):
+        return f"{self.base_url}{path}"
+
+    async def _request(self, path, read, params=None, headers=None):
+        """Issue a GET and hand the response to ``read``, tracking stats."""
+        if not self.is_open:
+            await self.start()
+        self._stats["requests"] += 1
+        self._stats["in_flight"] += 1
+        started = time.perf_counter()
+        status = None
+        try:
+            async with self._session.get(
+                self.url_for(path), params=params, headers=headers
+            ) as resp:
+                status = resp.status
+                result = await read(resp)
+        except Exception as e:
+            self._stats["errors"] += 1
+            self._report(not is_upstream_failure(e), status, started)
+            raise
+        finally:
+            self._stats["in_flight"] -= 1
+            self._stats["total_latency"] += time.perf_counter() - started
+        self._report(True, status, started)
+        return result
+
+    def _report(self, ok, status, started):
+        if self._on_result is not None:
+            self._on_result(ok, status, time.perf_counter() - started)
+
+    async def _single_flight(self, key, request):
+        """Run ``request()`` once for all concurrent callers with ``key``.
+
+        Every caller gets the same result (or exception). A caller being
+        cancelled doesn't cancel the shared request for the others.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(request())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._request_done(key, t))
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _request_done(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved even if every caller gave up
+
+    async def get_json(self, path, params=None):
+        """GET ``base_url + path`` and return the decoded JSON body.
+
+        Raises the usual aiohttp errors (``ClientResponseError`` for bad
+        statuses, ``ClientError`` for network failures) so callers can keep
+        their existing error handling. Concurrent identical calls share one
+        request and the same decoded object, so callers must not mutate it.
+        """
+        async def read(resp):
+            resp.raise_for_status()
+            return await resp.json()
+
+        key = ("json", path, tuple(sorted((params or {}).items())))
+        return await self._single_flight(
+            key, lambda: self._request(path, read, params=params)
+        )
+
+    async def get_conditional(self, path, etag=None, last_modified=None):
+        """Conditional GET that skips the body when upstream says 304.
+
+        Returns a dict with ``status``, the raw ``body`` bytes (``None`` on
+        304), a ``hash`` of the body for change detection when upstream
+        sends no validators, and the response's ``etag``/``last_modified``.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        async def read(resp):
+            if resp.status == 304:
+                self._stats["not_modified"] += 1
+                return {
+                    "status": 304,
+                    "body": None,
+                    "hash": None,
+                    "etag": resp.headers.get("ETag", etag),
+                    "last_modified": resp.headers.get(
+                        "Last-Modified", last_modified
+                    ),
+                }
+            resp.raise_for_status()
+            body = await resp.read()
+            self._stats["bytes_received"] += len(body)
+            return {
+                "status": resp.status,
+                "body": body,
+                "hash": hashlib.blake2b(body, digest_size=16).hexdigest(),
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+
+        key = ("conditional", path, etag, last_modified)
+        return await self._single_flight(
+            key, lambda: self._request(path, read, headers=headers or None)
+        )
+
+    def pool_stats(self):
+        """Return a snapshot of request and connection pool statistics."""
+        stats = dict(self._stats)
+        total_latency = stats.pop("total_latency")
+        stats["avg_latency_ms"] = (
+            total_latency / stats["requests"] * 1000
+            if stats["requests"] else 0.0
+        )
+        stats["pool_limit"] = POOL_LIMIT
+        stats["pool_limit_per_host"] = POOL_LIMIT_PER_HOST
+        connector = self._session.connector if self.is_open else None
+        stats["open"] = connector is not None and not connector.closed
+        return stats